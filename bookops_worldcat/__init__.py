@@ -1,4 +1,7 @@
 from .__version__ import __title__, __version__  # noqa: F401
 
-from .authorize import WorldcatAccessToken  # noqa: F401
-from .metadata_api import MetadataSession  # noqa: F401
+# default `User-Agent` header value formatted once for all modules
+_DEFAULT_USER_AGENT = f"{__title__}/{__version__}"
+
+from .authorize import WorldcatAccessToken  # noqa: E402, F401
+from .metadata_api import MetadataSession  # noqa: E402, F401
@@ -4,30 +4,243 @@
 Base session class to be subclassed for use with individual OCLC APIs.
 """
 
-from typing import Optional, Tuple, Union, List
+from __future__ import annotations
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    List,
+)
 
 import requests
-from urllib3.util import Retry
+from requests.exceptions import ConnectionError, HTTPError, Timeout, RetryError
+from urllib3.util.retry import Retry
 
-from . import __title__, __version__
+from . import _DEFAULT_USER_AGENT
 from .authorize import WorldcatAccessToken
+from .errors import WorldcatRequestError
+
+T = TypeVar("T")
+
+_POOL_CONNECTIONS = 10
+_POOL_MAXSIZE = 50
+_DEFAULT_TIMEOUT: Tuple[int, int] = (5, 5)
+# status codes returned by the web service when it is asked to slow down
+_THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+# connection pool shared by all sessions that do not configure their own adapter
+_DEFAULT_ADAPTER = requests.adapters.HTTPAdapter(
+    pool_connections=_POOL_CONNECTIONS, pool_maxsize=_POOL_MAXSIZE, pool_block=False
+)
+
+
+@lru_cache(maxsize=16)
+def _get_retry(
+    total: int,
+    backoff_factor: float,
+    status_forcelist: Optional[Tuple[int, ...]],
+    allowed_methods: Optional[Tuple[str, ...]],
+) -> Retry:
+    """
+    Returns `Retry` object for given retry settings. `Retry` objects are not
+    modified by urllib3, so a single instance is shared by all sessions
+    configured with the same settings. If `status_forcelist` is `None`, requests
+    with status codes 413, 429, and 503 are retried.
+    """
+    return Retry(
+        total=total,
+        backoff_factor=backoff_factor,
+        status_forcelist=(
+            Retry.RETRY_AFTER_STATUS_CODES
+            if status_forcelist is None
+            else status_forcelist
+        ),
+        allowed_methods=allowed_methods,
+    )
+
+
+class _BearerAuth(requests.auth.AuthBase):
+    """
+    Attaches the current access token of `WorldcatAccessToken` to each request
+    as an `Authorization` header when the request is prepared. The header value
+    is rebuilt only when the token changes.
+    """
+
+    def __init__(self, authorization: WorldcatAccessToken) -> None:
+        self.authorization = authorization
+        self._token_str: Optional[str] = None
+        self._header = ""
+
+    def __call__(self, r: requests.PreparedRequest) -> requests.PreparedRequest:
+        token_str = self.authorization.token_str
+        # `token_str` is the same object until a new token is requested
+        if token_str is not self._token_str:
+            self._header = f"Bearer {token_str}"
+            self._token_str = token_str
+        r.headers["Authorization"] = self._header
+        return r
+
+
+def _is_throttled(result: Any) -> bool:
+    """
+    Checks if the web service asked to slow down while processing a request.
+    `result` is a value returned by a function passed to `WorldcatSession.bulk`
+    or an exception raised by it. Requests retried by urllib3 keep the status
+    codes of failed attempts in the retry history of the response.
+    """
+    if isinstance(result, BaseException):
+        result = getattr(result.__cause__, "response", None)
+    if not isinstance(result, requests.Response):
+        return False
+    if result.status_code in _THROTTLE_STATUS_CODES:
+        return True
+    retries = getattr(getattr(result, "raw", None), "retries", None)
+    history = getattr(retries, "history", None) or ()
+    return any(attempt.status in _THROTTLE_STATUS_CODES for attempt in history)
+
+
+class _ConcurrencyLimit:
+    """
+    Limits the number of requests sent at the same time by `WorldcatSession.bulk`.
+    The limit starts at `maximum`, is halved each time the web service responds
+    with 429 or 503 status codes, and grows back by about one request per round
+    of successful requests (additive increase, multiplicative decrease).
+    """
+
+    __slots__ = ("limit", "minimum", "maximum", "_in_flight", "_condition")
+
+    def __init__(self, maximum: int, minimum: int = 1) -> None:
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.limit = float(maximum)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, throttled: bool) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class _ResponseCache:
+    """
+    Least recently used cache of responses to GET requests keyed by URL and
+    `Accept` header. Responses expire `ttl` seconds after they were added. A cache
+    with `maxsize` of `0` does not store any responses.
+    """
+
+    __slots__ = ("maxsize", "ttl", "_data", "_lock")
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Tuple[str, str], Tuple[float, requests.Response]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Tuple[str, str]) -> Optional[requests.Response]:
+        if not self._data:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: Tuple[str, str], response: requests.Response) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, response)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, url: str) -> None:
+        """Removes cached responses for `url` in all formats."""
+        if not self._data:
+            return
+        with self._lock:
+            for key in [key for key in self._data if key[0] == url]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _limited(func: Callable[[Any], T], limit: _ConcurrencyLimit) -> Callable[[Any], T]:
+    """
+    Wraps `func` to wait for `limit` before each call and to report to it if
+    the web service asked to slow down.
+    """
+
+    def call(item: Any) -> T:
+        limit.acquire()
+        try:
+            result = func(item)
+        except BaseException as exc:
+            limit.release(_is_throttled(exc))
+            raise
+        limit.release(_is_throttled(result))
+        return result
+
+    return call
 
 
 class WorldcatSession(requests.Session):
     """Base class for WorldCat API sessions. Inherits all `requests.Session` methods."""
 
+    # instances keep the default unless a different timeout is passed
+    timeout: Union[int, float, Tuple[int, int], Tuple[float, float], None] = (
+        _DEFAULT_TIMEOUT
+    )
+
     def __init__(
         self,
         authorization: WorldcatAccessToken,
         agent: Optional[str] = None,
-        timeout: Union[int, float, Tuple[int, int], Tuple[float, float], None] = (
-            5,
-            5,
-        ),
+        timeout: Union[
+            int, float, Tuple[int, int], Tuple[float, float], None
+        ] = _DEFAULT_TIMEOUT,
         totalRetries: int = 0,
         backoffFactor: float = 0,
         statusForcelist: Optional[List[int]] = None,
         allowedMethods: Optional[List[str]] = None,
+        adapter: Optional[requests.adapters.HTTPAdapter] = None,
+        poolMaxsize: Optional[int] = None,
+        poolBlock: bool = False,
+        cacheSize: int = 0,
+        cacheTtl: float = 3600,
     ) -> None:
         """
         Args:
@@ -60,6 +273,33 @@ class WorldcatSession(requests.Session):
                 will be retried.
 
                 **EXAMPLE:** `["GET", "POST"]`
+            adapter:
+                Optional `requests.adapters.HTTPAdapter` instance to be used for
+                all requests in the session. An adapter may be shared between
+                multiple sessions to reuse its pool of open connections. If
+                `adapter` is passed, arguments passed to `totalRetries`,
+                `backoffFactor`, `statusForcelist`, and `allowedMethods` will be
+                ignored. If none of `adapter`, `totalRetries`, `poolMaxsize`, or
+                `poolBlock` is passed, the session uses a connection pool shared by
+                all sessions.
+            poolMaxsize:
+                Optional maximum number of connections to the web service kept open
+                for reuse. Should be at least the number of threads sending requests
+                concurrently with the session. If not specified, up to 50
+                connections are kept open.
+            poolBlock:
+                Whether threads should wait for a pooled connection to become
+                available when all `poolMaxsize` connections are in use. By default
+                a new connection is opened and discarded after the request, which
+                repeats the TCP and TLS handshake for every request above the pool
+                size.
+            cacheSize:
+                Maximum number of responses to GET requests for individual records
+                kept in memory and returned for repeated requests. By default
+                responses are not cached.
+            cacheTtl:
+                Number of seconds a cached response is returned for repeated
+                requests. Ignored if `cacheSize` is `0`.
         """
         super().__init__()
         self.authorization = authorization
@@ -69,50 +309,220 @@ class WorldcatSession(requests.Session):
                 "Argument 'authorization' must be 'WorldcatAccessToken' object."
             )
 
-        if agent is None:
-            self.headers.update({"User-Agent": f"{__title__}/{__version__}"})
-        elif agent and isinstance(agent, str):
-            self.headers.update({"User-Agent": agent})
-        else:
+        user_agent = _DEFAULT_USER_AGENT if agent is None else agent
+        if not user_agent or not isinstance(user_agent, str):
             raise ValueError("Argument 'agent' must be a string.")
 
-        self.timeout = timeout
+        # the default timeout object is passed unchanged by subclasses
+        if timeout is not _DEFAULT_TIMEOUT and timeout != _DEFAULT_TIMEOUT:
+            self.timeout = timeout
 
-        # if user provides retry args, create Retry object and mount adapter to session
-        if totalRetries != 0:
-            if statusForcelist is None:
-                retries = Retry(
-                    total=totalRetries,
-                    backoff_factor=backoffFactor,
-                    status_forcelist=Retry.RETRY_AFTER_STATUS_CODES,
-                    allowed_methods=allowedMethods,
-                )
-            elif (
-                isinstance(statusForcelist, List)
-                and all(isinstance(x, int) for x in statusForcelist)
-                and len(statusForcelist) > 0
-            ):
-                retries = Retry(
-                    total=totalRetries,
-                    backoff_factor=backoffFactor,
-                    status_forcelist=statusForcelist,
-                    allowed_methods=allowedMethods,
-                )
-            else:
-                raise ValueError(
-                    "Argument 'statusForcelist' must be a list of integers."
+        if poolMaxsize is not None and (
+            not isinstance(poolMaxsize, int) or poolMaxsize < 1
+        ):
+            raise ValueError("Argument 'poolMaxsize' must be a positive integer.")
+
+        if not isinstance(cacheSize, int) or cacheSize < 0:
+            raise ValueError("Argument 'cacheSize' must be a non-negative integer.")
+        if not isinstance(cacheTtl, (int, float)) or cacheTtl <= 0:
+            raise ValueError("Argument 'cacheTtl' must be a positive number.")
+        self._cache = _ResponseCache(cacheSize, cacheTtl)
+
+        # sessions reuse a shared connection pool unless configured otherwise
+        self._shared_adapter: Optional[requests.adapters.HTTPAdapter] = None
+        if adapter is not None:
+            self._shared_adapter = adapter
+        elif totalRetries == 0 and poolMaxsize is None and not poolBlock:
+            self._shared_adapter = _DEFAULT_ADAPTER
+            adapter = _DEFAULT_ADAPTER
+        else:
+            # if user provides retry args, create Retry object
+            retries: Union[Retry, int] = 0
+            if totalRetries != 0:
+                status_forcelist: Optional[Tuple[int, ...]] = None
+                if statusForcelist is not None:
+                    try:
+                        status_forcelist = tuple(statusForcelist)
+                    except TypeError:
+                        status_forcelist = ()
+                    if not status_forcelist or not all(
+                        isinstance(x, int) for x in status_forcelist
+                    ):
+                        raise ValueError(
+                            "Argument 'statusForcelist' must be a list of integers."
+                        )
+                retries = _get_retry(
+                    totalRetries,
+                    backoffFactor,
+                    status_forcelist,
+                    None if allowedMethods is None else tuple(allowedMethods),
                 )
-            self.mount("https://", requests.adapters.HTTPAdapter(max_retries=retries))
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=_POOL_CONNECTIONS,
+                pool_maxsize=poolMaxsize or _POOL_MAXSIZE,
+                pool_block=poolBlock,
+                max_retries=retries,
+            )
+
+        # replace the two default adapters created by requests.Session with one
+        # adapter serving both schemes
+        self.adapters = OrderedDict([("https://", adapter), ("http://", adapter)])
+
+        # access token is added to each request when it is prepared, so a
+        # refreshed token does not require any changes to session headers
+        self.auth = _BearerAuth(self.authorization)
+        self.headers.update({"User-Agent": user_agent, "Connection": "keep-alive"})
+
+    def bulk(
+        self, func: Callable[[Any], T], iterable: Iterable[Any], maxWorkers: int = 10
+    ) -> List[T]:
+        """
+        Calls `func` on each item of `iterable` using a pool of threads that share
+        the session and its pooled connections. When the web service responds
+        with 429 or 503 status codes, fewer requests are sent at the same time
+        until requests succeed again.
+
+        Args:
+            func:
+                Callable accepting a single item of `iterable`, typically a method
+                of the session, for example `session.bib_get`.
+            iterable:
+                Items to be passed to `func`.
+            maxWorkers:
+                Maximum number of requests sent at the same time. Should not exceed
+                the session's `poolMaxsize`.
+
+        Returns:
+            list of values returned by `func` in the order of `iterable`
+
+        Example:
+            ```py
+            with MetadataSession(authorization=token) as session:
+                responses = session.bulk(session.bib_get, [850939579, 850939580])
+            ```
+        """
+        call = _limited(func, _ConcurrencyLimit(maxWorkers))
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            return list(executor.map(call, iterable))
+
+    def bulk_iter(
+        self, func: Callable[[Any], T], iterable: Iterable[Any], maxWorkers: int = 10
+    ) -> Iterator[T]:
+        """
+        Works like `bulk`, but takes items from `iterable` only as requests complete
+        and yields values returned by `func` as soon as they are available. Up to
+        twice `maxWorkers` items are taken ahead, so items may be read from
+        disk or parsed while earlier requests are being sent, and large iterables
+        are never held in memory at once.
+
+        Args:
+            func:
+                Callable accepting a single item of `iterable`, typically a method
+                of the session, for example `session.bib_validate`.
+            iterable:
+                Items to be passed to `func`. May be a generator.
+            maxWorkers:
+                Maximum number of requests sent at the same time. Should not exceed
+                the session's `poolMaxsize`.
+
+        Yields:
+            values returned by `func` in the order of `iterable`
+
+        Example:
+            ```py
+            with MetadataSession(authorization=token) as session:
+                for response in session.bulk_iter(session.bib_validate, records):
+                    print(response.json())
+            ```
+        """
+        call = _limited(func, _ConcurrencyLimit(maxWorkers))
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            pending: Deque[Future[T]] = deque()
+            try:
+                for item in iterable:
+                    pending.append(executor.submit(call, item))
+                    if len(pending) >= 2 * maxWorkers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                # requests are not sent for items left after an error or after
+                # the caller stopped iterating
+                for future in pending:
+                    future.cancel()
+
+    def clear_cache(self) -> None:
+        """
+        Removes all cached responses. Should be called after records retrieved
+        earlier in the session have been changed.
+        """
+        self._cache.clear()
+
+    def close(self) -> None:
+        """
+        Closes all adapters owned by the session. A shared adapter is left open
+        so its pooled connections can be reused by other sessions.
+        """
+        for adapter in self.adapters.values():
+            if adapter is not self._shared_adapter:
+                adapter.close()
+
+    def _execute(
+        self,
+        prepared_request: requests.PreparedRequest,
+        timeout: Union[int, float, Tuple[int, int], Tuple[float, float], None],
+    ) -> requests.Response:
+        """
+        Sends a prepared request to the web service and unifies exceptions.
+        An expired access token is refreshed before the request is sent.
+
+        Args:
+            prepared_request:
+                `requests.PreparedRequest` instance.
+            timeout:
+                How long to wait for server to send data before giving up. Accepts
+                separate values for connect and read timeouts or a single value.
+
+        Returns:
+            `requests.Response` instance
+
+        Raises:
+            WorldcatRequestError:
+                If the request encounters any errors.
+        """
+        # make sure access token is still valid and if not request a new one
+        if self.authorization.is_expired():
+            self._get_new_access_token()
+            # request was prepared with the expired token
+            prepared_request.prepare_auth(self.auth)
+
+        try:
+            response = self.send(prepared_request, timeout=timeout)
+            response.raise_for_status()
+
+        except HTTPError as exc:
+            raise WorldcatRequestError(
+                f"{exc}. Server response: " f"{response.content.decode('utf-8')}"
+            ) from exc
+        except (Timeout, ConnectionError, RetryError) as exc:
+            raise WorldcatRequestError(f"Connection Error: {type(exc)}") from exc
 
-        self._update_authorization()
+        except Exception as exc:
+            raise WorldcatRequestError(
+                f"Unexpected request error: {type(exc)}"
+            ) from exc
+
+        return response
 
     def _get_new_access_token(self) -> None:
         """
         Allows to continue sending request with new access token after
-        the previous one expired
+        the previous one expired. When several threads or sessions sharing the
+        token find it expired at the same time, only the first one requests
+        a new token and the others reuse it.
         """
-        self.authorization._request_token()
-        self._update_authorization()
-
-    def _update_authorization(self) -> None:
-        self.headers.update({"Authorization": f"Bearer {self.authorization.token_str}"})
+        token_str = self.authorization.token_str
+        with self.authorization._refresh_lock:
+            # token was not refreshed by another thread while waiting for the lock
+            if self.authorization.token_str is token_str:
+                self.authorization._request_token()
@@ -4,16 +4,114 @@
 Provides means to authenticate and authorize interactions with OCLC web services.
 """
 
+from __future__ import annotations
+import base64
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import hashlib
 import sys
-from typing import Dict, Optional, Tuple, Union
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlencode
 
 import requests
+from urllib3.util.retry import Retry
 
-from . import __title__, __version__
+from . import _DEFAULT_USER_AGENT
 from .errors import WorldcatAuthorizationError
 
 
+# session shared by all tokens to reuse open connections to the OAuth server;
+# created with the first token request
+_TOKEN_SESSION: Optional[requests.Session] = None
+_TOKEN_SESSION_LOCK = threading.Lock()
+
+
+# tokens returned by `WorldcatAccessToken.get_or_create` keyed by a hash of
+# credentials and scopes, least recently used first; a lock per key lets only
+# one thread request a token for the key and is stored with the number of
+# threads using it, so it can be removed once no thread needs it
+_TOKEN_CACHE: OrderedDict[bytes, WorldcatAccessToken] = OrderedDict()
+_TOKEN_CACHE_LOCKS: Dict[bytes, Tuple[threading.Lock, int]] = {}
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+# maximum number of tokens kept by `WorldcatAccessToken.get_or_create`
+_TOKEN_CACHE_MAXSIZE = 32
+
+# tokens expiring sooner than that many seconds are not reused from cache
+_TOKEN_CACHE_MARGIN = 60
+
+# longest wait in seconds before retrying a token request as asked by the
+# `Retry-After` header of a rate limited (429) or unavailable (503) response
+_TOKEN_RETRY_AFTER_MAX = 30
+
+
+class _TokenRetry(Retry):
+    """
+    `Retry` for access token requests that waits no longer than
+    `_TOKEN_RETRY_AFTER_MAX` seconds when asked to by the `Retry-After` header.
+    """
+
+    def parse_retry_after(self, retry_after: str) -> float:
+        return min(super().parse_retry_after(retry_after), _TOKEN_RETRY_AFTER_MAX)
+
+
+def _get_token_session() -> requests.Session:
+    """
+    Returns `requests.Session` used for all access token requests. Transient
+    server errors and rate limited (429) requests are retried over the same pool
+    of connections, waiting as long as the server's `Retry-After` header asks but
+    no longer than 30 seconds. The last response is returned for parsing when
+    retries are exhausted.
+    """
+    global _TOKEN_SESSION
+    if _TOKEN_SESSION is None:
+        with _TOKEN_SESSION_LOCK:
+            if _TOKEN_SESSION is None:
+                # random jitter spreads out retries of tokens refreshed at
+                # the same time
+                retries = _TokenRetry(
+                    total=3,
+                    backoff_factor=0.3,
+                    backoff_jitter=0.3,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["POST"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                session = requests.Session()
+                session.mount(
+                    "https://",
+                    requests.adapters.HTTPAdapter(
+                        pool_connections=4, pool_maxsize=10, max_retries=retries
+                    ),
+                )
+                _TOKEN_SESSION = session
+    return _TOKEN_SESSION
+
+
+def _validate_str_arg(name: str, value: str) -> None:
+    """
+    Checks if argument is a non-empty string.
+
+    Args:
+        name:
+            name of the argument
+        value:
+            value passed to the argument
+
+    Raises:
+        TypeError: If `value` is not a str.
+        ValueError: If `value` is an empty str or consists of whitespace only.
+    """
+    if not isinstance(value, str):
+        raise TypeError(f"Argument '{name}' must be a string.")
+    if not value or value.isspace():
+        raise ValueError(f"Argument '{name}' cannot be an empty string.")
+
+
 class WorldcatAccessToken:
     """
     Requests a WorldCat access token.
@@ -61,6 +159,31 @@ class WorldcatAccessToken:
         ```
     """  # noqa: E501
 
+    __slots__ = (
+        "agent",
+        "grant_type",
+        "key",
+        "oauth_server",
+        "scopes",
+        "secret",
+        "server_response",
+        "timeout",
+        "token_str",
+        "token_type",
+        "_basic_auth",
+        "_expires_at_raw",
+        "_expires_at_ts",
+        "_headers",
+        "_payload_cache",
+        "_refresh_lock",
+        "_repr",
+        "_session",
+        "_token_expires_at",
+        "_token_request_url",
+        "_token_url_str",
+    )
+    _expires_at_raw: Optional[str]
+
     def __init__(
         self,
         key: str,
@@ -71,6 +194,7 @@ class WorldcatAccessToken:
             5,
             5,
         ),
+        session: Optional[requests.Session] = None,
     ) -> None:
         """Initializes WorldcatAccessToken object.
 
@@ -102,6 +226,10 @@ class WorldcatAccessToken:
             timeout:
                 How long to wait for server to send data before giving up. Accepts
                 separate values for connect and read timeouts or a single value.
+            session:
+                Optional `requests.Session` instance used to request the access
+                token and its refreshes. If not passed, token requests are sent
+                with a session shared by all tokens.
 
         Raises:
             TypeError:
@@ -119,45 +247,262 @@ class WorldcatAccessToken:
         self.oauth_server = "https://oauth.oclc.org"
         self.scopes = scopes
         self.secret = secret
+        self._session = session
+        # held while the token is refreshed, so sessions sharing the token
+        # request a new one only once
+        self._refresh_lock = threading.Lock()
         self.server_response: Optional[requests.Response] = None
         self.timeout = timeout
-        self.token_expires_at: Optional[datetime.datetime] = None
+        self.token_expires_at = None
         self.token_str = ""
         self.token_type = ""
 
         # default bookops-worldcat request header
-        if isinstance(self.agent, str):
-            if not self.agent.strip():
-                self.agent = f"{__title__}/{__version__}"
-        else:
+        if not isinstance(self.agent, str):
             raise TypeError("Argument 'agent' must be a string.")
+        if not self.agent or self.agent.isspace():
+            self.agent = _DEFAULT_USER_AGENT
 
         # ensure passed arguments are valid
-        if isinstance(self.key, str):
-            if not self.key.strip():
-                raise ValueError("Argument 'key' cannot be an empty string.")
-        else:
-            raise TypeError("Argument 'key' must be a string.")
-
-        if isinstance(self.secret, str):
-            if not self.secret.strip():
-                raise ValueError("Argument 'secret' cannot be an empty string.")
-        else:
-            raise TypeError("Argument 'secret' must be a string.")
-
-        # validate passed scopes
-        if isinstance(self.scopes, str):
-            if not self.scopes.strip():
-                raise ValueError("Argument 'scopes' cannot be an empty string.")
-        else:
-            raise TypeError("Argument 'scopes' must a string.")
-        self.scopes = self.scopes.strip()
+        for name, value in (("key", key), ("secret", secret), ("scopes", scopes)):
+            _validate_str_arg(name, value)
+        # `strip` returns the same object for already clean strings; interning
+        # shares one scopes string between tokens created with the same scopes
+        self.scopes = sys.intern(self.scopes.strip())
+
+        # token request values do not change, so they are prepared once
+        # (latin1 encoding of credentials matches `requests.auth.HTTPBasicAuth`)
+        self._basic_auth = "Basic " + base64.b64encode(
+            f"{self.key}:{self.secret}".encode("latin1")
+        ).decode("ascii")
+        self._headers = {
+            "User-Agent": self.agent,
+            "Accept": "application/json",
+            "Authorization": self._basic_auth,
+        }
+        self._payload_cache = {"grant_type": self.grant_type, "scope": self.scopes}
+        self._token_url_str = f"{self.oauth_server}/token"
+        # grant type and scopes are sent in the query string
+        self._token_request_url = (
+            f"{self._token_url_str}?{urlencode(self._payload_cache)}"
+        )
 
         # initiate request
         self._request_token()
 
-    def _auth(self) -> Tuple[str, str]:
-        return (self.key, self.secret)
+    @classmethod
+    def from_scopes(
+        cls,
+        key: str,
+        secret: str,
+        scopes: List[str],
+        agent: str = "",
+        timeout: Union[int, float, Tuple[int, int], Tuple[float, float], None] = (
+            5,
+            5,
+        ),
+        maxWorkers: int = 10,
+    ) -> List["WorldcatAccessToken"]:
+        """
+        Requests access tokens for multiple scopes at the same time. Useful for
+        WSKeys set up to act on behalf of multiple institutions that need a
+        token for each `context:{registryID}`. Token requests are sent
+        concurrently from a pool of threads sharing open connections to the
+        OAuth server.
+
+        Args:
+            key:
+                Your WSKey public client_id
+            secret:
+                Your WSKey secret
+            scopes:
+                List of scopes strings, one per access token.
+
+                **EXAMPLE:**
+                `["WorldCatMetadataAPI context:00001",
+                "WorldCatMetadataAPI context:00002"]`
+            agent:
+                `User-agent` parameter to be passed in the request header.
+            timeout:
+                How long to wait for server to send data before giving up. Accepts
+                separate values for connect and read timeouts or a single value.
+            maxWorkers:
+                Maximum number of token requests sent at the same time.
+
+        Returns:
+            list of `WorldcatAccessToken` instances in the order of `scopes`
+
+        Raises:
+            WorldcatAuthorizationError:
+                If any of the token requests encounters errors.
+
+        Example:
+            ```py
+            tokens = WorldcatAccessToken.from_scopes(
+                key="my_WSKey_client_id",
+                secret="my_WSKey_secret",
+                scopes=[
+                    "WorldCatMetadataAPI context:00001",
+                    "WorldCatMetadataAPI context:00002",
+                ],
+                agent="my_app/1.0.0")
+            ```
+        """
+        return cls.bulk_acquire(
+            [
+                dict(key=key, secret=secret, scopes=scope, agent=agent, timeout=timeout)
+                for scope in scopes
+            ],
+            maxWorkers=maxWorkers,
+        )
+
+    @classmethod
+    def bulk_acquire(
+        cls, params: List[Dict[str, Any]], maxWorkers: int = 10
+    ) -> List["WorldcatAccessToken"]:
+        """
+        Requests access tokens for multiple sets of credentials and scopes at the
+        same time. Token requests are sent concurrently from a pool of threads
+        sharing open connections to the OAuth server.
+
+        Args:
+            params:
+                List of dictionaries with `WorldcatAccessToken` arguments, one per
+                access token.
+
+                **EXAMPLE:**
+                `[{"key": "my_WSKey", "secret": "my_secret",
+                "scopes": "WorldCatMetadataAPI"}]`
+            maxWorkers:
+                Maximum number of token requests sent at the same time. Token
+                requests share a pool of up to 10 open connections unless a
+                `session` is passed in `params`.
+
+        Returns:
+            list of `WorldcatAccessToken` instances in the order of `params`
+
+        Raises:
+            WorldcatAuthorizationError:
+                If any of the token requests encounters errors.
+
+        Example:
+            ```py
+            tokens = WorldcatAccessToken.bulk_acquire(
+                [
+                    {"key": "key1", "secret": "secret1", "scopes": "WorldCatMetadataAPI"},
+                    {"key": "key2", "secret": "secret2", "scopes": "WorldCatMetadataAPI"},
+                ])
+            ```
+        """  # noqa: E501
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            return list(executor.map(lambda kwargs: cls(**kwargs), params))
+
+    @classmethod
+    def get_or_create(
+        cls,
+        key: str,
+        secret: str,
+        scopes: str,
+        agent: str = "",
+        timeout: Union[int, float, Tuple[int, int], Tuple[float, float], None] = (
+            5,
+            5,
+        ),
+        session: Optional[requests.Session] = None,
+    ) -> "WorldcatAccessToken":
+        """
+        Returns an access token for given credentials and scopes reusing a token
+        obtained earlier in the process with this method if it is valid for at
+        least another 60 seconds. Otherwise requests a new token. Useful for
+        applications creating a token for each worker or session. Tokens for up
+        to 32 different credentials and scopes are kept.
+
+        Args:
+            key:
+                Your WSKey public client_id
+            secret:
+                Your WSKey secret
+            scopes:
+                Request scopes for the access token as a string.
+            agent:
+                `User-agent` parameter to be passed in the request header. Used
+                only if a new token is requested.
+            timeout:
+                How long to wait for server to send data before giving up. Used
+                only if a new token is requested.
+            session:
+                Optional `requests.Session` instance used if a new token is
+                requested.
+
+        Returns:
+            `WorldcatAccessToken` instance
+
+        Raises:
+            WorldcatAuthorizationError:
+                If request for token encounters any errors.
+
+        Example:
+            ```py
+            token = WorldcatAccessToken.get_or_create(
+                key="my_WSKey_client_id",
+                secret="my_WSKey_secret",
+                scopes="WorldCatMetadataAPI",
+                agent="my_app/1.0.0")
+            ```
+        """
+        # secrets are not kept in the cache keys
+        cache_key = hashlib.sha256(
+            repr(
+                (key, secret, scopes.strip() if isinstance(scopes, str) else "")
+            ).encode("utf-8")
+        ).digest()
+        with _TOKEN_CACHE_LOCK:
+            key_lock, users = _TOKEN_CACHE_LOCKS.get(cache_key, (threading.Lock(), 0))
+            _TOKEN_CACHE_LOCKS[cache_key] = (key_lock, users + 1)
+
+        try:
+            # threads asking for the same token wait for the first one to obtain it
+            with key_lock:
+                with _TOKEN_CACHE_LOCK:
+                    token = _TOKEN_CACHE.get(cache_key)
+                    if token is not None:
+                        _TOKEN_CACHE.move_to_end(cache_key)
+                if (
+                    token is None
+                    or token._expiration_deadline() - _TOKEN_CACHE_MARGIN
+                    <= time.monotonic()
+                ):
+                    token = cls(key, secret, scopes, agent, timeout, session)
+                    with _TOKEN_CACHE_LOCK:
+                        _TOKEN_CACHE[cache_key] = token
+                        _TOKEN_CACHE.move_to_end(cache_key)
+                        if len(_TOKEN_CACHE) > _TOKEN_CACHE_MAXSIZE:
+                            _TOKEN_CACHE.popitem(last=False)
+                return token
+        finally:
+            with _TOKEN_CACHE_LOCK:
+                key_lock, users = _TOKEN_CACHE_LOCKS[cache_key]
+                if users == 1:
+                    del _TOKEN_CACHE_LOCKS[cache_key]
+                else:
+                    _TOKEN_CACHE_LOCKS[cache_key] = (key_lock, users - 1)
+
+    def _expiration_deadline(self) -> float:
+        """
+        Returns expiration time of the token on the `time.monotonic` clock.
+
+        Raises:
+            TypeError:
+                If `WorldcatAccessToken.token_expires_at` is not a
+                `datetime.datetime` object.
+        """
+        self._parse_expiry()
+        if self._expires_at_ts is None:
+            raise TypeError(
+                "Attribute 'WorldcatAccessToken.token_expires_at' is of invalid type. "
+                "Expected `datetime.datetime` object."
+            )
+        return self._expires_at_ts
 
     def _hasten_expiration_time(self, utc_stamp_str: str) -> datetime.datetime:
         """
@@ -171,12 +516,19 @@ class WorldcatAccessToken:
         Returns:
             UTC timestamp as `datetime.datetime` object
         """
-        utcstamp = datetime.datetime.strptime(
-            utc_stamp_str, "%Y-%m-%d %H:%M:%SZ"
+        # server returns timestamps in fixed "%Y-%m-%d %H:%M:%SZ" format
+        utcstamp = datetime.datetime.fromisoformat(utc_stamp_str[:-1]).replace(
+            tzinfo=datetime.timezone.utc
         ) - datetime.timedelta(seconds=1)
-        utcstamp = utcstamp.replace(tzinfo=datetime.timezone.utc)
         return utcstamp
 
+    def _parse_expiry(self) -> None:
+        """
+        Parses expiration time received from the server, if it was not parsed yet.
+        """
+        if self._expires_at_raw is not None:
+            self.token_expires_at = self._hasten_expiration_time(self._expires_at_raw)
+
     def _parse_server_response(self, response: requests.Response) -> None:
         """Parses authorization server response
 
@@ -185,20 +537,18 @@ class WorldcatAccessToken:
         """
         self.server_response = response
         if response.status_code == requests.codes.ok:
-            self.token_str = response.json()["access_token"]
-            self.token_expires_at = self._hasten_expiration_time(
-                response.json()["expires_at"]
-            )
-            self.token_type = response.json()["token_type"]
+            data = response.json()
+            self.token_str = data["access_token"]
+            # expiration time is parsed when first needed
+            self.token_expires_at = None
+            self._expires_at_raw = data["expires_at"]
+            self.token_type = data["token_type"]
         else:
             raise WorldcatAuthorizationError(response.content)
 
     def _payload(self) -> Dict[str, str]:
         """Preps requests params"""
-        return {
-            "grant_type": self.grant_type,
-            "scope": self.scopes,
-        }
+        return self._payload_cache
 
     def _post_token_request(self) -> requests.Response:
         """
@@ -212,24 +562,26 @@ class WorldcatAccessToken:
             WorldcatAuthorizationError: If access token POST request encounters any errors.
         """  # noqa: E501
 
-        token_url = self._token_url()
-        headers = self._token_headers()
-        auth = self._auth()
-        payload = self._payload()
         try:
-            response = requests.post(
-                token_url,
-                auth=auth,
-                headers=headers,
-                params=payload,
+            session = _get_token_session() if self._session is None else self._session
+            response = session.post(
+                self._token_request_url,
+                headers=self._headers,
                 timeout=self.timeout,
             )
             return response
 
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
-            raise WorldcatAuthorizationError(f"Trouble connecting: {sys.exc_info()[0]}")
-        except Exception:
-            raise WorldcatAuthorizationError(f"Unexpected error: {sys.exc_info()[0]}")
+        except (
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectionError,
+        ) as exc:
+            raise WorldcatAuthorizationError(
+                f"Trouble connecting: {type(exc).__name__}: {exc}"
+            ) from exc
+        except Exception as exc:
+            raise WorldcatAuthorizationError(
+                f"Unexpected error: {type(exc).__name__}: {exc}"
+            ) from exc
 
     def _request_token(self):
         """
@@ -239,10 +591,30 @@ class WorldcatAccessToken:
         self._parse_server_response(response)
 
     def _token_headers(self) -> Dict[str, str]:
-        return {"User-Agent": self.agent, "Accept": "application/json"}
+        return self._headers
 
     def _token_url(self) -> str:
-        return f"{self.oauth_server}/token"
+        return self._token_url_str
+
+    @property
+    def token_expires_at(self) -> Optional[datetime.datetime]:
+        """Expiration time of the access token as `datetime.datetime` object."""
+        self._parse_expiry()
+        return self._token_expires_at
+
+    @token_expires_at.setter
+    def token_expires_at(self, value: Optional[datetime.datetime]) -> None:
+        self._expires_at_raw = None
+        self._repr: Optional[Tuple[str, str]] = None
+        self._token_expires_at = value
+        # deadline on the monotonic clock lets `is_expired` compare floats and
+        # is not affected by changes of the system clock
+        self._expires_at_ts: Optional[float] = (
+            time.monotonic()
+            + (value - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            if isinstance(value, datetime.datetime)
+            else None
+        )
 
     def is_expired(self) -> bool:
         """
@@ -267,19 +639,19 @@ class WorldcatAccessToken:
             #>False
             ```
         """
-        if isinstance(self.token_expires_at, datetime.datetime):
-            if self.token_expires_at < datetime.datetime.now(datetime.timezone.utc):
-                return True
-            else:
-                return False
-        else:
-            raise TypeError(
-                "Attribute 'WorldcatAccessToken.token_expires_at' is of invalid type. "
-                "Expected `datetime.datetime` object."
-            )
+        return self._expiration_deadline() < time.monotonic()
 
     def __repr__(self):
-        return (
-            f"access_token: '{self.token_str}', "
-            f"expires_at: '{self.token_expires_at:%Y-%m-%d %H:%M:%SZ}'"
-        )
+        token_expires_at = self.token_expires_at
+        # repr is rebuilt only after the token or its expiration time changes
+        if self._repr is None or self._repr[0] is not self.token_str:
+            expires_at = (
+                "None"
+                if token_expires_at is None
+                else f"'{token_expires_at:%Y-%m-%d %H:%M:%SZ}'"
+            )
+            self._repr = (
+                self.token_str,
+                f"access_token: '{self.token_str}', expires_at: {expires_at}",
+            )
+        return self._repr[1]
@@ -2,15 +2,33 @@
 
 """WorldCat Metadata API wrapper session."""
 
-from typing import Callable, Dict, List, Optional, Tuple, Union, BinaryIO
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Union, BinaryIO
 
 from requests import Request, Response
+from requests.adapters import HTTPAdapter
 
-from ._session import WorldcatSession
+from ._session import WorldcatSession, _DEFAULT_TIMEOUT
 from .authorize import WorldcatAccessToken
-from .query import Query
 from .utils import verify_oclc_number, verify_oclc_numbers
 
+# record validation levels accepted by the Metadata API
+_VALIDATION_LEVELS = frozenset({"validateFull", "validateAdd", "validateReplace"})
+# read-only header shared by requests to endpoints returning JSON
+_JSON_HEADER = MappingProxyType({"Accept": "application/json"})
+
+
+def _encode_record(record: Union[str, bytes, BinaryIO]) -> Union[bytes, BinaryIO]:
+    """
+    Encodes records passed as strings to UTF-8. `http.client` would otherwise
+    encode the request body as Latin-1 and fail on records with characters
+    outside of it. Bytes and file objects are passed unchanged and file objects
+    are streamed by `requests`.
+    """
+    if isinstance(record, str):
+        return record.encode("utf-8")
+    return record
+
 
 class MetadataSession(WorldcatSession):
     """
@@ -29,14 +47,18 @@ class MetadataSession(WorldcatSession):
         self,
         authorization: WorldcatAccessToken,
         agent: Optional[str] = None,
-        timeout: Union[int, float, Tuple[int, int], Tuple[float, float], None] = (
-            5,
-            5,
-        ),
+        timeout: Union[
+            int, float, Tuple[int, int], Tuple[float, float], None
+        ] = _DEFAULT_TIMEOUT,
         totalRetries: int = 0,
         backoffFactor: float = 0,
         statusForcelist: Optional[List[int]] = None,
         allowedMethods: Optional[List[str]] = None,
+        adapter: Optional[HTTPAdapter] = None,
+        poolMaxsize: Optional[int] = None,
+        poolBlock: bool = False,
+        cacheSize: int = 0,
+        cacheTtl: float = 3600,
     ) -> None:
         """Initializes MetadataSession.
 
@@ -71,6 +93,34 @@ class MetadataSession(WorldcatSession):
                 will be retried.
 
                 **EXAMPLE:** `["GET", "POST"]`
+            adapter:
+                Optional `requests.adapters.HTTPAdapter` instance to be used for
+                all requests in the session. An adapter may be shared between
+                multiple sessions to reuse its pool of open connections. If
+                `adapter` is passed, arguments passed to `totalRetries`,
+                `backoffFactor`, `statusForcelist`, and `allowedMethods` will be
+                ignored. If none of `adapter`, `totalRetries`, `poolMaxsize`, or
+                `poolBlock` is passed, the session uses a connection pool shared by
+                all sessions.
+            poolMaxsize:
+                Optional maximum number of connections to the web service kept open
+                for reuse. Should be at least the number of threads sending requests
+                concurrently with the session. If not specified, up to 50
+                connections are kept open.
+            poolBlock:
+                Whether threads should wait for a pooled connection to become
+                available when all `poolMaxsize` connections are in use. By default
+                a new connection is opened and discarded after the request, which
+                repeats the TCP and TLS handshake for every request above the pool
+                size.
+            cacheSize:
+                Maximum number of responses kept in memory and returned for repeated
+                requests made with `bib_get`, `bib_get_classification`,
+                `brief_bibs_get`, `holdings_get_codes`, `lbd_get`, `lhr_get`, and
+                `local_bibs_get` methods. By default responses are not cached.
+            cacheTtl:
+                Number of seconds a cached response is returned for repeated
+                requests. Ignored if `cacheSize` is `0`.
         """
         super().__init__(
             authorization,
@@ -80,6 +130,11 @@ class MetadataSession(WorldcatSession):
             backoffFactor=backoffFactor,
             statusForcelist=statusForcelist,
             allowedMethods=allowedMethods,
+            adapter=adapter,
+            poolMaxsize=poolMaxsize,
+            poolBlock=poolBlock,
+            cacheSize=cacheSize,
+            cacheTtl=cacheTtl,
         )
 
     def _url_manage_bibs_validate(self, validationLevel: str) -> str:
@@ -169,6 +224,43 @@ class MetadataSession(WorldcatSession):
     def _url_search_lbd(self) -> str:
         return f"{self.BASE_URL}/search/my-local-bib-data"
 
+    def _cached_get(
+        self,
+        url: str,
+        header: Mapping[str, str],
+        hooks: Optional[Dict[str, Callable]] = None,
+    ) -> Response:
+        """
+        Sends a GET request or returns a cached response to the same request.
+        Requests with hooks are always sent since hooks are not called for cached
+        responses.
+        """
+        key = (url, header["Accept"])
+        if hooks is None:
+            response = self._cache.get(key)
+            if response is not None:
+                return response
+
+        # prep request
+        req = Request("GET", url, headers=header, hooks=hooks)
+        prepared_request = self.prepare_request(req)
+
+        # send request
+        response = self._execute(prepared_request, self.timeout)
+
+        if hooks is None:
+            self._cache.set(key, response)
+        return response
+
+    def _discard_cached_bib(self, oclcNumber: str) -> None:
+        """
+        Removes cached responses of `bib_get`, `bib_get_classification`, and
+        `brief_bibs_get` for a bibliographic record that has changed.
+        """
+        self._cache.discard(self._url_manage_bibs(oclcNumber))
+        self._cache.discard(self._url_search_classification_bibs(oclcNumber))
+        self._cache.discard(self._url_search_brief_bibs_oclc_number(oclcNumber))
+
     def bib_create(
         self,
         record: Union[str, bytes, BinaryIO],
@@ -183,7 +275,8 @@ class MetadataSession(WorldcatSession):
 
         Args:
             record:
-                MARC record to be created
+                MARC record to be created. Can be a string, bytes, or a file object
+                opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -207,13 +300,13 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("POST", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "POST", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def bib_get(
         self,
@@ -247,14 +340,7 @@ class MetadataSession(WorldcatSession):
         url = self._url_manage_bibs(oclcNumber)
         header = {"Accept": responseFormat}
 
-        # prep request
-        req = Request("GET", url, headers=header, hooks=hooks)
-        prepared_request = self.prepare_request(req)
-
-        # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._cached_get(url, header, hooks)
 
     def bib_get_classification(
         self,
@@ -282,16 +368,9 @@ class MetadataSession(WorldcatSession):
         oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_classification_bibs(oclcNumber)
-        header = {"Accept": "application/json"}
-
-        # prep request
-        req = Request("GET", url, headers=header, hooks=hooks)
-        prepared_request = self.prepare_request(req)
-
-        # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        header = _JSON_HEADER
 
-        return query.response
+        return self._cached_get(url, header, hooks)
 
     def bib_get_current_oclc_number(
         self,
@@ -323,7 +402,7 @@ class MetadataSession(WorldcatSession):
         if len(vetted_numbers) > 10:
             raise ValueError("Too many OCLC Numbers passed to 'oclcNumbers' argument.")
 
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         url = self._url_manage_bibs_current_oclc_number()
         payload = {"oclcNumbers": ",".join(vetted_numbers)}
 
@@ -332,9 +411,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def bib_match(
         self,
@@ -351,7 +428,8 @@ class MetadataSession(WorldcatSession):
 
         Args:
             record:
-                MARC record to be matched.
+                MARC record to be matched. Can be a string, bytes, or a file object
+                opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -371,13 +449,13 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("POST", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "POST", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def bib_replace(
         self,
@@ -390,12 +468,14 @@ class MetadataSession(WorldcatSession):
         """
         Given an OCLC number and MARC record, find record in WorldCat and replace it.
         If the record does not exist in WorldCat, a new bib record will be created.
+        Responses for the record cached by the session are removed.
 
         Uses /manage/bibs/{oclcNumber} endpoint.
 
         Args:
             record:
-                MARC record to replace existing WorldCat record
+                MARC record to replace existing WorldCat record. Can be a string, bytes,
+                or a file object opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -421,13 +501,17 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("PUT", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "PUT", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        response = self._execute(prepared_request, self.timeout)
 
-        return query.response
+        # responses cached before the change are stale
+        self._discard_cached_bib(oclcNumber)
+        return response
 
     def bib_search(
         self,
@@ -454,16 +538,14 @@ class MetadataSession(WorldcatSession):
         oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_bibs(oclcNumber)
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
 
         # prep request
         req = Request("GET", url, headers=header, hooks=hooks)
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def bib_validate(
         self,
@@ -479,7 +561,8 @@ class MetadataSession(WorldcatSession):
 
         Args:
             record:
-                MARC record to validate
+                MARC record to validate. Can be a string, bytes, or a file object opened
+                in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -501,7 +584,7 @@ class MetadataSession(WorldcatSession):
                 If value of arg passed to `validationLevel` is not
                 `'validateFull'`, `'validateAdd'`, or `'validateReplace'`.
         """
-        if validationLevel not in ["validateFull", "validateAdd", "validateReplace"]:
+        if validationLevel not in _VALIDATION_LEVELS:
             raise ValueError(
                 "Invalid argument 'validationLevel'."
                 "Must be either 'validateFull', 'validateAdd', or 'validateReplace'"
@@ -517,16 +600,14 @@ class MetadataSession(WorldcatSession):
         req = Request(
             "POST",
             url,
-            data=record,
+            data=_encode_record(record),
             headers=header,
             hooks=hooks,
         )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def brief_bibs_get(
         self, oclcNumber: Union[int, str], hooks: Optional[Dict[str, Callable]] = None
@@ -551,16 +632,9 @@ class MetadataSession(WorldcatSession):
         oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_brief_bibs_oclc_number(oclcNumber)
-        header = {"Accept": "application/json"}
-
-        # prep request
-        req = Request("GET", url, headers=header, hooks=hooks)
-        prepared_request = self.prepare_request(req)
-
-        # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        header = _JSON_HEADER
 
-        return query.response
+        return self._cached_get(url, header, hooks)
 
     def brief_bibs_search(
         self,
@@ -745,41 +819,45 @@ class MetadataSession(WorldcatSession):
             `requests.Response` instance
         """  # noqa: E501
         url = self._url_search_brief_bibs()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "q": q,
-            "deweyNumber": deweyNumber,
-            "datePublished": datePublished,
-            "heldByGroup": heldByGroup,
-            "heldBySymbol": heldBySymbol,
-            "heldByInstitutionID": heldByInstitutionID,
-            "inLanguage": inLanguage,
-            "inCatalogLanguage": inCatalogLanguage,
-            "materialType": materialType,
-            "catalogSource": catalogSource,
-            "itemType": itemType,
-            "itemSubType": itemSubType,
-            "retentionCommitments": retentionCommitments,
-            "spProgram": spProgram,
-            "genre": genre,
-            "topic": topic,
-            "subtopic": subtopic,
-            "audience": audience,
-            "content": content,
-            "openAccess": openAccess,
-            "peerReviewed": peerReviewed,
-            "facets": facets,
-            "groupRelatedEditions": groupRelatedEditions,
-            "groupVariantRecords": groupVariantRecords,
-            "preferredLanguage": preferredLanguage,
-            "showHoldingsIndicators": showHoldingsIndicators,
-            "lat": lat,
-            "lon": lon,
-            "distance": distance,
-            "unit": unit,
-            "orderBy": orderBy,
-            "offset": offset,
-            "limit": limit,
+            k: v
+            for k, v in (
+                ("q", q),
+                ("deweyNumber", deweyNumber),
+                ("datePublished", datePublished),
+                ("heldByGroup", heldByGroup),
+                ("heldBySymbol", heldBySymbol),
+                ("heldByInstitutionID", heldByInstitutionID),
+                ("inLanguage", inLanguage),
+                ("inCatalogLanguage", inCatalogLanguage),
+                ("materialType", materialType),
+                ("catalogSource", catalogSource),
+                ("itemType", itemType),
+                ("itemSubType", itemSubType),
+                ("retentionCommitments", retentionCommitments),
+                ("spProgram", spProgram),
+                ("genre", genre),
+                ("topic", topic),
+                ("subtopic", subtopic),
+                ("audience", audience),
+                ("content", content),
+                ("openAccess", openAccess),
+                ("peerReviewed", peerReviewed),
+                ("facets", facets),
+                ("groupRelatedEditions", groupRelatedEditions),
+                ("groupVariantRecords", groupVariantRecords),
+                ("preferredLanguage", preferredLanguage),
+                ("showHoldingsIndicators", showHoldingsIndicators),
+                ("lat", lat),
+                ("lon", lon),
+                ("distance", distance),
+                ("unit", unit),
+                ("orderBy", orderBy),
+                ("offset", offset),
+                ("limit", limit),
+            )
+            if v is not None
         }
 
         # prep request
@@ -787,9 +865,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def brief_bibs_get_other_editions(
         self,
@@ -941,35 +1017,39 @@ class MetadataSession(WorldcatSession):
         oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_brief_bibs_other_editions(oclcNumber)
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "deweyNumber": deweyNumber,
-            "datePublished": datePublished,
-            "heldByGroup": heldByGroup,
-            "heldBySymbol": heldBySymbol,
-            "heldByInstitutionID": heldByInstitutionID,
-            "inLanguage": inLanguage,
-            "inCatalogLanguage": inCatalogLanguage,
-            "materialType": materialType,
-            "catalogSource": catalogSource,
-            "itemType": itemType,
-            "itemSubType": itemSubType,
-            "retentionCommitments": retentionCommitments,
-            "spProgram": spProgram,
-            "genre": genre,
-            "topic": topic,
-            "subtopic": subtopic,
-            "audience": audience,
-            "content": content,
-            "openAccess": openAccess,
-            "peerReviewed": peerReviewed,
-            "facets": facets,
-            "groupVariantRecords": groupVariantRecords,
-            "preferredLanguage": preferredLanguage,
-            "showHoldingsIndicators": showHoldingsIndicators,
-            "offset": offset,
-            "limit": limit,
-            "orderBy": orderBy,
+            k: v
+            for k, v in (
+                ("deweyNumber", deweyNumber),
+                ("datePublished", datePublished),
+                ("heldByGroup", heldByGroup),
+                ("heldBySymbol", heldBySymbol),
+                ("heldByInstitutionID", heldByInstitutionID),
+                ("inLanguage", inLanguage),
+                ("inCatalogLanguage", inCatalogLanguage),
+                ("materialType", materialType),
+                ("catalogSource", catalogSource),
+                ("itemType", itemType),
+                ("itemSubType", itemSubType),
+                ("retentionCommitments", retentionCommitments),
+                ("spProgram", spProgram),
+                ("genre", genre),
+                ("topic", topic),
+                ("subtopic", subtopic),
+                ("audience", audience),
+                ("content", content),
+                ("openAccess", openAccess),
+                ("peerReviewed", peerReviewed),
+                ("facets", facets),
+                ("groupVariantRecords", groupVariantRecords),
+                ("preferredLanguage", preferredLanguage),
+                ("showHoldingsIndicators", showHoldingsIndicators),
+                ("offset", offset),
+                ("limit", limit),
+                ("orderBy", orderBy),
+            )
+            if v is not None
         }
 
         # prep request
@@ -977,9 +1057,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def holdings_get_codes(
         self,
@@ -1000,16 +1078,9 @@ class MetadataSession(WorldcatSession):
             `requests.Response` instance
         """
         url = self._url_manage_ih_codes()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
 
-        # prep request
-        req = Request("GET", url, headers=header, hooks=hooks)
-        prepared_request = self.prepare_request(req)
-
-        # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._cached_get(url, header, hooks)
 
     def holdings_get_current(
         self,
@@ -1047,7 +1118,7 @@ class MetadataSession(WorldcatSession):
             raise ValueError("Too many OCLC Numbers passed to 'oclcNumbers' argument.")
 
         url = self._url_manage_ih_current()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
 
         payload = {"oclcNumbers": vetted_numbers}
 
@@ -1056,9 +1127,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def holdings_set(
         self,
@@ -1066,7 +1135,9 @@ class MetadataSession(WorldcatSession):
         hooks: Optional[Dict[str, Callable]] = None,
     ) -> Response:
         """
-        Sets institution's WorldCat holdings on an individual record.
+        Sets institution's WorldCat holdings on an individual record. Responses
+        for the record cached by the session are removed. Cached holding codes
+        returned by `holdings_get_codes` are not affected.
 
         Uses /manage/institions/holdings/{oclcNumber}/set endpoint.
 
@@ -1085,16 +1156,18 @@ class MetadataSession(WorldcatSession):
         oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_manage_ih_set(oclcNumber)
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
 
         # prep request
         req = Request("POST", url, headers=header, hooks=hooks)
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        response = self._execute(prepared_request, self.timeout)
 
-        return query.response
+        # responses cached before the change are stale
+        self._discard_cached_bib(oclcNumber)
+        return response
 
     def holdings_unset(
         self,
@@ -1103,7 +1176,10 @@ class MetadataSession(WorldcatSession):
         hooks: Optional[Dict[str, Callable]] = None,
     ) -> Response:
         """
-        Unsets institution's WorldCat holdings on an individual record.
+        Unsets institution's WorldCat holdings on an individual record. Responses
+        for the record cached by the session are removed. Cached holding codes
+        and Local Bibliographic Data or local holdings records removed with
+        `cascadeDelete` are not affected.
 
         Uses /manage/institions/holdings/{oclcNumber}/unset endpoint.
 
@@ -1127,7 +1203,7 @@ class MetadataSession(WorldcatSession):
         oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_manage_ih_unset(oclcNumber)
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
 
         payload = {"cascadeDelete": cascadeDelete}
 
@@ -1136,26 +1212,30 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        response = self._execute(prepared_request, self.timeout)
 
-        return query.response
+        # responses cached before the change are stale
+        self._discard_cached_bib(oclcNumber)
+        return response
 
     def holdings_set_with_bib(
         self,
-        record: str,
+        record: Union[str, bytes, BinaryIO],
         recordFormat: str,
         hooks: Optional[Dict[str, Callable]] = None,
     ) -> Response:
         """
         Given a MARC record in MARCXML or MARC21, set institution holdings on the
         record. MARC record must contain OCLC number in 001 or 035 subfield a.
-        Only one MARC record is allowed in the request body.
+        Only one MARC record is allowed in the request body. Responses for the
+        record cached by the session are not removed.
 
         Uses /manage/institution/holdings/set endpoint.
 
         Args:
             record:
-                MARC record on which to set holdings.
+                MARC record on which to set holdings. Can be a string, bytes, or a file
+                object opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -1175,17 +1255,17 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("POST", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "POST", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def holdings_unset_with_bib(
         self,
-        record: str,
+        record: Union[str, bytes, BinaryIO],
         recordFormat: str,
         cascadeDelete: bool = True,
         hooks: Optional[Dict[str, Callable]] = None,
@@ -1193,13 +1273,15 @@ class MetadataSession(WorldcatSession):
         """
         Given a MARC record in MARCXML or MARC21, unset institution holdings on the
         record. MARC record must contain OCLC number in 001 or 035 subfield a.
-        Only one MARC record is allowed in the request body.
+        Only one MARC record is allowed in the request body. Responses for the
+        record cached by the session are not removed.
 
         Uses /manage/institution/holdings/unset endpoint.
 
         Args:
             record:
-                MARC record on which to unset holdings.
+                MARC record on which to unset holdings. Can be a string, bytes, or a
+                file object opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -1230,7 +1312,7 @@ class MetadataSession(WorldcatSession):
         req = Request(
             "POST",
             url,
-            data=record,
+            data=_encode_record(record),
             params=payload,
             headers=header,
             hooks=hooks,
@@ -1238,12 +1320,11 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def lbd_create(
         self,
-        record: str,
+        record: Union[str, bytes, BinaryIO],
         recordFormat: str,
         responseFormat: str = "application/marcxml+xml",
         hooks: Optional[Dict[str, Callable]] = None,
@@ -1255,7 +1336,8 @@ class MetadataSession(WorldcatSession):
 
         Args:
             record:
-                MARC record to be created.
+                MARC record to be created. Can be a string, bytes, or a file object
+                opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -1279,13 +1361,13 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("POST", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "POST", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def lbd_delete(
         self,
@@ -1322,9 +1404,12 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        response = self._execute(prepared_request, self.timeout)
 
-        return query.response
+        # responses cached before the change are stale
+        self._cache.discard(url)
+        self._cache.discard(self._url_search_lbd_control_number(controlNumber))
+        return response
 
     def lbd_get(
         self,
@@ -1356,19 +1441,12 @@ class MetadataSession(WorldcatSession):
         url = self._url_manage_lbd(controlNumber)
         header = {"Accept": responseFormat}
 
-        # prep request
-        req = Request("GET", url, headers=header, hooks=hooks)
-        prepared_request = self.prepare_request(req)
-
-        # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._cached_get(url, header, hooks)
 
     def lbd_replace(
         self,
         controlNumber: Union[int, str],
-        record: str,
+        record: Union[str, bytes, BinaryIO],
         recordFormat: str,
         responseFormat: str = "application/marcxml+xml",
         hooks: Optional[Dict[str, Callable]] = None,
@@ -1385,7 +1463,8 @@ class MetadataSession(WorldcatSession):
                 Control number associated with Local Bibliographic Data record.
                 Can be an integer or string.
             record:
-                MARC record to replace existing Local Bibliographic Data record.
+                MARC record to replace existing Local Bibliographic Data record. Can be
+                a string, bytes, or a file object opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -1409,17 +1488,22 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("PUT", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "PUT", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        response = self._execute(prepared_request, self.timeout)
 
-        return query.response
+        # responses cached before the change are stale
+        self._cache.discard(url)
+        self._cache.discard(self._url_search_lbd_control_number(controlNumber))
+        return response
 
     def lhr_create(
         self,
-        record: str,
+        record: Union[str, bytes, BinaryIO],
         recordFormat: str,
         responseFormat: str = "application/marcxml+xml",
         hooks: Optional[Dict[str, Callable]] = None,
@@ -1431,7 +1515,8 @@ class MetadataSession(WorldcatSession):
 
         Args:
             record:
-                MARC holdings record to be created.
+                MARC holdings record to be created. Can be a string, bytes, or a file
+                object opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -1455,13 +1540,13 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("POST", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "POST", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def lhr_delete(
         self,
@@ -1498,9 +1583,11 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        response = self._execute(prepared_request, self.timeout)
 
-        return query.response
+        # responses cached before the change are stale
+        self._cache.discard(url)
+        return response
 
     def lhr_get(
         self,
@@ -1532,19 +1619,12 @@ class MetadataSession(WorldcatSession):
         url = self._url_manage_lhr(controlNumber)
         header = {"Accept": responseFormat}
 
-        # prep request
-        req = Request("GET", url, headers=header, hooks=hooks)
-        prepared_request = self.prepare_request(req)
-
-        # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._cached_get(url, header, hooks)
 
     def lhr_replace(
         self,
         controlNumber: Union[int, str],
-        record: str,
+        record: Union[str, bytes, BinaryIO],
         recordFormat: str,
         responseFormat: str = "application/marcxml+xml",
         hooks: Optional[Dict[str, Callable]] = None,
@@ -1561,7 +1641,8 @@ class MetadataSession(WorldcatSession):
                 Control number associated with Local Holdings record.
                 Can be an integer or string.
             record:
-                MARC holdings record to replace existing local holdings record.
+                MARC holdings record to replace existing local holdings record. Can be a
+                string, bytes, or a file object opened in binary mode.
             recordFormat:
                 Format of MARC record.
 
@@ -1585,13 +1666,17 @@ class MetadataSession(WorldcatSession):
         }
 
         # prep request
-        req = Request("PUT", url, data=record, headers=header, hooks=hooks)
+        req = Request(
+            "PUT", url, data=_encode_record(record), headers=header, hooks=hooks
+        )
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        response = self._execute(prepared_request, self.timeout)
 
-        return query.response
+        # responses cached before the change are stale
+        self._cache.discard(url)
+        return response
 
     def local_bibs_get(
         self,
@@ -1616,16 +1701,9 @@ class MetadataSession(WorldcatSession):
             `requests.Response` instance
         """
         url = self._url_search_lbd_control_number(controlNumber)
-        header = {"Accept": "application/json"}
-
-        # prep request
-        req = Request("GET", url, headers=header, hooks=hooks)
-        prepared_request = self.prepare_request(req)
-
-        # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
+        header = _JSON_HEADER
 
-        return query.response
+        return self._cached_get(url, header, hooks)
 
     def local_bibs_search(
         self,
@@ -1668,7 +1746,7 @@ class MetadataSession(WorldcatSession):
             `requests.Response` instance
         """  # noqa: E501
         url = self._url_search_lbd()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {"q": q, "offset": offset, "limit": limit}
 
         # prep request
@@ -1676,9 +1754,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def local_holdings_browse(
         self,
@@ -1723,14 +1799,18 @@ class MetadataSession(WorldcatSession):
             oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_browse_lhr()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "callNumber": callNumber,
-            "oclcNumber": oclcNumber,
-            "holdingLocation": holdingLocation,
-            "shelvingLocation": shelvingLocation,
-            "browsePosition": browsePosition,
-            "limit": limit,
+            k: v
+            for k, v in (
+                ("callNumber", callNumber),
+                ("oclcNumber", oclcNumber),
+                ("holdingLocation", holdingLocation),
+                ("shelvingLocation", shelvingLocation),
+                ("browsePosition", browsePosition),
+                ("limit", limit),
+            )
+            if v is not None
         }
 
         # prep request
@@ -1738,9 +1818,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def local_holdings_get(
         self,
@@ -1765,16 +1843,14 @@ class MetadataSession(WorldcatSession):
             `requests.Response` instance
         """
         url = self._url_search_lhr_control_number(controlNumber)
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
 
         # prep request
         req = Request("GET", url, headers=header, hooks=hooks)
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def local_holdings_search(
         self,
@@ -1819,13 +1895,17 @@ class MetadataSession(WorldcatSession):
             oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_lhr()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "oclcNumber": oclcNumber,
-            "barcode": barcode,
-            "orderBy": orderBy,
-            "offset": offset,
-            "limit": limit,
+            k: v
+            for k, v in (
+                ("oclcNumber", oclcNumber),
+                ("barcode", barcode),
+                ("orderBy", orderBy),
+                ("offset", offset),
+                ("limit", limit),
+            )
+            if v is not None
         }
 
         # prep request
@@ -1833,9 +1913,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def local_holdings_search_shared_print(
         self,
@@ -1891,16 +1969,20 @@ class MetadataSession(WorldcatSession):
             oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_lhr_shared_print()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "oclcNumber": oclcNumber,
-            "barcode": barcode,
-            "heldBySymbol": heldBySymbol,
-            "heldByInstitutionID": heldByInstitutionID,
-            "spProgram": spProgram,
-            "orderBy": orderBy,
-            "offset": offset,
-            "limit": limit,
+            k: v
+            for k, v in (
+                ("oclcNumber", oclcNumber),
+                ("barcode", barcode),
+                ("heldBySymbol", heldBySymbol),
+                ("heldByInstitutionID", heldByInstitutionID),
+                ("spProgram", spProgram),
+                ("orderBy", orderBy),
+                ("offset", offset),
+                ("limit", limit),
+            )
+            if v is not None
         }
 
         # prep request
@@ -1908,9 +1990,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def shared_print_holdings_search(
         self,
@@ -1967,15 +2047,19 @@ class MetadataSession(WorldcatSession):
             oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_shared_print_holdings()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "oclcNumber": oclcNumber,
-            "isbn": isbn,
-            "issn": issn,
-            "heldByGroup": heldByGroup,
-            "heldInState": heldInState,
-            "itemType": itemType,
-            "itemSubType": itemSubType,
+            k: v
+            for k, v in (
+                ("oclcNumber", oclcNumber),
+                ("isbn", isbn),
+                ("issn", issn),
+                ("heldByGroup", heldByGroup),
+                ("heldInState", heldInState),
+                ("itemType", itemType),
+                ("itemSubType", itemSubType),
+            )
+            if v is not None
         }
 
         # prep request
@@ -1983,9 +2067,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def summary_holdings_search(
         self,
@@ -2090,25 +2172,29 @@ class MetadataSession(WorldcatSession):
             oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_general_holdings()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "oclcNumber": oclcNumber,
-            "isbn": isbn,
-            "issn": issn,
-            "holdingsAllEditions": holdingsAllEditions,
-            "holdingsAllVariantRecords": holdingsAllVariantRecords,
-            "preferredLanguage": preferredLanguage,
-            "holdingsFilterFormat": holdingsFilterFormat,
-            "heldInCountry": heldInCountry,
-            "heldInState": heldInState,
-            "heldByGroup": heldByGroup,
-            "heldBySymbol": heldBySymbol,
-            "heldByInstitutionID": heldByInstitutionID,
-            "heldByLibraryType": heldByLibraryType,
-            "lat": lat,
-            "lon": lon,
-            "distance": distance,
-            "unit": unit,
+            k: v
+            for k, v in (
+                ("oclcNumber", oclcNumber),
+                ("isbn", isbn),
+                ("issn", issn),
+                ("holdingsAllEditions", holdingsAllEditions),
+                ("holdingsAllVariantRecords", holdingsAllVariantRecords),
+                ("preferredLanguage", preferredLanguage),
+                ("holdingsFilterFormat", holdingsFilterFormat),
+                ("heldInCountry", heldInCountry),
+                ("heldInState", heldInState),
+                ("heldByGroup", heldByGroup),
+                ("heldBySymbol", heldBySymbol),
+                ("heldByInstitutionID", heldByInstitutionID),
+                ("heldByLibraryType", heldByLibraryType),
+                ("lat", lat),
+                ("lon", lon),
+                ("distance", distance),
+                ("unit", unit),
+            )
+            if v is not None
         }
 
         # prep request
@@ -2116,9 +2202,7 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
 
     def summary_holdings_get(
         self,
@@ -2207,22 +2291,26 @@ class MetadataSession(WorldcatSession):
         oclcNumber = verify_oclc_number(oclcNumber)
 
         url = self._url_search_general_holdings_summary()
-        header = {"Accept": "application/json"}
+        header = _JSON_HEADER
         payload = {
-            "oclcNumber": oclcNumber,
-            "holdingsAllEditions": holdingsAllEditions,
-            "holdingsAllVariantRecords": holdingsAllVariantRecords,
-            "holdingsFilterFormat": holdingsFilterFormat,
-            "heldInCountry": heldInCountry,
-            "heldInState": heldInState,
-            "heldByGroup": heldByGroup,
-            "heldBySymbol": heldBySymbol,
-            "heldByInstitutionID": heldByInstitutionID,
-            "heldByLibraryType": heldByLibraryType,
-            "lat": lat,
-            "lon": lon,
-            "distance": distance,
-            "unit": unit,
+            k: v
+            for k, v in (
+                ("oclcNumber", oclcNumber),
+                ("holdingsAllEditions", holdingsAllEditions),
+                ("holdingsAllVariantRecords", holdingsAllVariantRecords),
+                ("holdingsFilterFormat", holdingsFilterFormat),
+                ("heldInCountry", heldInCountry),
+                ("heldInState", heldInState),
+                ("heldByGroup", heldByGroup),
+                ("heldBySymbol", heldBySymbol),
+                ("heldByInstitutionID", heldByInstitutionID),
+                ("heldByLibraryType", heldByLibraryType),
+                ("lat", lat),
+                ("lon", lon),
+                ("distance", distance),
+                ("unit", unit),
+            )
+            if v is not None
         }
 
         # prep request
@@ -2230,6 +2318,4 @@ class MetadataSession(WorldcatSession):
         prepared_request = self.prepare_request(req)
 
         # send request
-        query = Query(self, prepared_request, timeout=self.timeout)
-
-        return query.response
+        return self._execute(prepared_request, self.timeout)
@@ -4,11 +4,8 @@
 
 from __future__ import annotations
 from typing import Union, Tuple, TYPE_CHECKING
-import sys
 
 from requests import PreparedRequest
-from requests.exceptions import ConnectionError, HTTPError, Timeout, RetryError
-from .errors import WorldcatRequestError
 
 
 if TYPE_CHECKING:
@@ -54,21 +51,4 @@ class Query:
         if not isinstance(prepared_request, PreparedRequest):
             raise TypeError("Invalid type for argument 'prepared_request'.")
 
-        # make sure access token is still valid and if not request a new one
-        if session.authorization.is_expired():
-            session._get_new_access_token()
-
-        try:
-            self.response = session.send(prepared_request, timeout=timeout)
-            self.response.raise_for_status()
-
-        except HTTPError as exc:
-            raise WorldcatRequestError(
-                f"{exc}. Server response: "  # type: ignore
-                f"{self.response.content.decode('utf-8')}"
-            )
-        except (Timeout, ConnectionError, RetryError):
-            raise WorldcatRequestError(f"Connection Error: {sys.exc_info()[0]}")
-
-        except Exception:
-            raise WorldcatRequestError(f"Unexpected request error: {sys.exc_info()[0]}")
+        self.response = session._execute(prepared_request, timeout)
@@ -3,20 +3,29 @@
 """
 Shared utilities module.
 """
+from functools import lru_cache
 import re
 from typing import List, Union
 
 from .errors import InvalidOclcNumber
 
+# matches OCLC number prefix only if followed by the number of digits
+# required by the prefix
+_OCLC_PREFIX = re.compile(
+    r"^(?:ocm(?=[0-9]{,8}$)|ocn(?=[0-9]{9}$)|on(?=[0-9]{10,}$)|\(OCoLC\)(?=[0-9]{8,}$))"
+)
+
 
 def _str2list(s: str) -> List[str]:
     """Converts str into list - use for list of OCLC numbers"""
     return [n.strip() for n in s.split(",") if n.strip()]
 
 
+@lru_cache(maxsize=4096)
 def prep_oclc_number_str(oclcNumber: str) -> str:
     """
-    Checks for OCLC prefixes and removes them.
+    Checks for OCLC prefixes and removes them. Results for recently parsed
+    strings are cached.
 
     Args:
         oclcNumber:
@@ -30,14 +39,7 @@ def prep_oclc_number_str(oclcNumber: str) -> str:
         OCLC number formatting rules.
     """
 
-    if re.match(r"^ocm[0-9]{,8}$", oclcNumber.strip()) or re.match(
-        r"^ocn[0-9]{9}$", oclcNumber.strip()
-    ):
-        oclcNumber = oclcNumber.strip()[3:]
-    elif re.match(r"^on[0-9]{10,}$", oclcNumber.strip()):
-        oclcNumber = oclcNumber.strip()[2:]
-    elif re.match(r"^\(OCoLC\)[0-9]{8,}$", oclcNumber.strip()):
-        oclcNumber = oclcNumber.strip()[7:]
+    oclcNumber = _OCLC_PREFIX.sub("", oclcNumber.strip(), count=1)
 
     try:
         oclcNumber = str(int(oclcNumber))
@@ -156,7 +156,7 @@ def mock_successful_post_token_response(mock_now, monkeypatch) -> None:
     def mock_oauth_server_response(*args, **kwargs):
         return MockAuthServerResponseSuccess()
 
-    monkeypatch.setattr(requests, "post", mock_oauth_server_response)
+    monkeypatch.setattr(requests.Session, "post", mock_oauth_server_response)
 
 
 @pytest.fixture
@@ -164,12 +164,13 @@ def mock_failed_post_token_response(monkeypatch) -> None:
     def mock_oauth_server_response(*args, **kwargs):
         return MockAuthServerResponseFailure()
 
-    monkeypatch.setattr(requests, "post", mock_oauth_server_response)
+    monkeypatch.setattr(requests.Session, "post", mock_oauth_server_response)
 
 
 @pytest.fixture
 def mock_unexpected_error(monkeypatch) -> None:
     monkeypatch.setattr("requests.post", MockUnexpectedException)
+    monkeypatch.setattr("requests.Session.post", MockUnexpectedException)
     monkeypatch.setattr("requests.get", MockUnexpectedException)
     monkeypatch.setattr("requests.Session.send", MockUnexpectedException)
 
@@ -177,6 +178,7 @@ def mock_unexpected_error(monkeypatch) -> None:
 @pytest.fixture
 def mock_timeout(monkeypatch) -> None:
     monkeypatch.setattr("requests.post", MockTimeout)
+    monkeypatch.setattr("requests.Session.post", MockTimeout)
     monkeypatch.setattr("requests.get", MockTimeout)
     monkeypatch.setattr("requests.Session.send", MockTimeout)
 
@@ -184,6 +186,7 @@ def mock_timeout(monkeypatch) -> None:
 @pytest.fixture
 def mock_connection_error(monkeypatch) -> None:
     monkeypatch.setattr("requests.post", MockConnectionError)
+    monkeypatch.setattr("requests.Session.post", MockConnectionError)
     monkeypatch.setattr("requests.get", MockConnectionError)
     monkeypatch.setattr("requests.Session.send", MockConnectionError)
 
@@ -191,6 +194,7 @@ def mock_connection_error(monkeypatch) -> None:
 @pytest.fixture
 def mock_retry_error(monkeypatch) -> None:
     monkeypatch.setattr("requests.post", MockRetryError)
+    monkeypatch.setattr("requests.Session.post", MockRetryError)
     monkeypatch.setattr("requests.get", MockRetryError)
     monkeypatch.setattr("requests.Session.send", MockRetryError)
 
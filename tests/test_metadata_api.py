@@ -4,9 +4,12 @@ from contextlib import nullcontext as does_not_raise
 import datetime
 
 import pytest
+from requests import Request
+from requests.exceptions import HTTPError
 
 
 from bookops_worldcat import MetadataSession
+from bookops_worldcat.metadata_api import _JSON_HEADER
 from bookops_worldcat.errors import (
     WorldcatRequestError,
     WorldcatAuthorizationError,
@@ -22,8 +25,9 @@ class TestMockedMetadataSession:
             assert type(session.authorization).__name__ == "WorldcatAccessToken"
 
             # test header set up correctly:
+            req = session.prepare_request(Request("GET", "https://foo.org"))
             assert (
-                session.headers["Authorization"]
+                req.headers["Authorization"]
                 == "Bearer tk_Yebz4BpEp9dAsghA7KpWx6dYD1OZKWBlHjqW"
             )
 
@@ -50,6 +54,12 @@ class TestMockedMetadataSession:
             )
             assert session.authorization.is_expired() is False
 
+    def test_authorization_uses_current_token(self, stub_session):
+        stub_session.authorization.token_str = "tk_new"
+        req = stub_session.prepare_request(Request("GET", "https://foo.org"))
+        assert req.headers["Authorization"] == "Bearer tk_new"
+        assert "Authorization" not in stub_session.headers
+
     def test_get_new_access_token_exceptions(self, stub_session, mock_timeout):
         with pytest.raises(WorldcatAuthorizationError):
             stub_session._get_new_access_token()
@@ -422,6 +432,209 @@ class TestMockedMetadataSession:
     def test_brief_bibs_search(self, stub_session, mock_session_response):
         assert stub_session.brief_bibs_search(q="ti:Zendegi").status_code == 200
 
+    @pytest.mark.parametrize(
+        "method", ["bib_get", "bib_get_classification", "brief_bibs_get"]
+    )
+    def test_cached_get(self, mock_token, mocker, method):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            first = getattr(session, method)(12345)
+            second = getattr(session, method)("ocm00012345")
+            assert first is second
+            assert send.call_count == 1
+            getattr(session, method)(12346)
+            assert send.call_count == 2
+
+    @pytest.mark.parametrize("method", ["lbd_get", "lhr_get", "local_bibs_get"])
+    def test_cached_get_control_number(self, mock_token, mocker, method):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            first = getattr(session, method)(12345)
+            assert getattr(session, method)(12345) is first
+            assert send.call_count == 1
+
+    def test_cached_holdings_get_codes(self, mock_token, mocker):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            assert session.holdings_get_codes() is session.holdings_get_codes()
+            assert send.call_count == 1
+
+    @pytest.mark.parametrize(
+        "get_method,write_method,write_kwargs",
+        [
+            ("lbd_get", "lbd_replace", {"record": b"v2", "recordFormat": "foo"}),
+            ("lbd_get", "lbd_delete", {}),
+            ("local_bibs_get", "lbd_replace", {"record": b"v2", "recordFormat": "foo"}),
+            ("local_bibs_get", "lbd_delete", {}),
+            ("lhr_get", "lhr_replace", {"record": b"v2", "recordFormat": "foo"}),
+            ("lhr_get", "lhr_delete", {}),
+        ],
+    )
+    def test_cache_evicted_after_write(
+        self, mock_token, mocker, get_method, write_method, write_kwargs
+    ):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            getattr(session, get_method)(12345)
+            if get_method != "local_bibs_get":
+                getattr(session, get_method)(12345, responseFormat="application/marc")
+            getattr(session, write_method)(12345, **write_kwargs)
+            calls = send.call_count
+            getattr(session, get_method)(12345)
+            assert send.call_count == calls + 1
+            assert len(session._cache) == 1
+
+    @pytest.mark.parametrize(
+        "get_method", ["bib_get", "bib_get_classification", "brief_bibs_get"]
+    )
+    @pytest.mark.parametrize(
+        "write_method,write_kwargs",
+        [
+            ("bib_replace", {"record": b"v2", "recordFormat": "foo"}),
+            ("holdings_set", {}),
+            ("holdings_unset", {}),
+        ],
+    )
+    def test_cached_bib_evicted_after_write(
+        self, mock_token, mocker, get_method, write_method, write_kwargs
+    ):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            getattr(session, get_method)(12345)
+            session.bib_get(12346)
+            getattr(session, write_method)("ocm00012345", **write_kwargs)
+            calls = send.call_count
+            getattr(session, get_method)(12345)
+            assert send.call_count == calls + 1
+            session.bib_get(12346)
+            assert send.call_count == calls + 1
+
+    def test_cache_kept_after_failed_write(self, mock_token, mocker):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            session.lbd_get(12345)
+            send.return_value.raise_for_status.side_effect = HTTPError("400")
+            with pytest.raises(WorldcatRequestError):
+                session.lbd_replace(12345, record=b"v2", recordFormat="foo")
+            send.return_value.raise_for_status.side_effect = None
+            session.lbd_get(12345)
+            assert send.call_count == 2
+
+    def test_clear_cache(self, mock_token, mocker):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            session.lbd_get(12345)
+            session.clear_cache()
+            session.lbd_get(12345)
+            assert send.call_count == 2
+
+    def test_cached_get_with_hooks(self, mock_token, mocker):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            session.bib_get(12345)
+            session.bib_get(12345, hooks={"response": lambda r, *a, **kw: r})
+            assert send.call_count == 2
+
+    def test_cached_get_response_format(self, mock_token, mocker):
+        with MetadataSession(authorization=mock_token, cacheSize=10) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            session.bib_get(12345)
+            session.bib_get(12345, responseFormat="application/marc")
+            assert send.call_count == 2
+
+    def test_no_cache_by_default(self, stub_session, mocker):
+        send = mocker.patch.object(stub_session, "send")
+        send.return_value.status_code = 200
+        stub_session.bib_get(12345)
+        stub_session.bib_get(12345)
+        assert send.call_count == 2
+
+    @pytest.mark.parametrize(
+        "method", ["bib_create", "bib_match", "holdings_set_with_bib", "lbd_create"]
+    )
+    def test_str_record_encoded_as_utf8(self, stub_session, mocker, method):
+        send = mocker.patch.object(stub_session, "send")
+        send.return_value.status_code = 200
+        getattr(stub_session, method)(
+            record="<record>Zażółć gęślą jaźń 中文</record>",
+            recordFormat="application/marcxml+xml",
+        )
+        prepared_request = send.call_args[0][0]
+        assert prepared_request.body == (
+            "<record>Zażółć gęślą jaźń 中文</record>".encode("utf-8")
+        )
+        assert prepared_request.headers["Content-Length"] == str(
+            len(prepared_request.body)
+        )
+
+    def test_file_record_streamed(self, stub_session, mocker, tmp_path):
+        send = mocker.patch.object(stub_session, "send")
+        send.return_value.status_code = 200
+        path = tmp_path / "record.xml"
+        path.write_bytes(b"<record>foo</record>")
+        with open(path, "rb") as record:
+            stub_session.bib_validate(
+                record=record, recordFormat="application/marcxml+xml"
+            )
+            prepared_request = send.call_args[0][0]
+            assert prepared_request.body is record
+            assert prepared_request.headers["Content-Length"] == "20"
+
+    def test_base_url_overridden_in_subclass(self, mock_token, mocker):
+        class SandboxSession(MetadataSession):
+            BASE_URL = "https://sandbox.foo.org/worldcat"
+
+        with SandboxSession(authorization=mock_token) as session:
+            send = mocker.patch.object(session, "send")
+            send.return_value.status_code = 200
+            session.holdings_get_codes()
+            session.bib_get(12345)
+            session.brief_bibs_search(q="ti:foo")
+            urls = [c[0][0].url for c in send.call_args_list]
+        assert urls[0] == (
+            "https://sandbox.foo.org/worldcat/manage/institution/holding-codes"
+        )
+        assert urls[1] == "https://sandbox.foo.org/worldcat/manage/bibs/12345"
+        assert urls[2].startswith("https://sandbox.foo.org/worldcat/search/brief-bibs?")
+
+    def test_base_url_overridden_on_instance(self, stub_session):
+        stub_session.BASE_URL = "https://sandbox.foo.org/worldcat"
+        assert stub_session._url_manage_bibs_create() == (
+            "https://sandbox.foo.org/worldcat/manage/bibs"
+        )
+        assert stub_session._url_search_lbd() == (
+            "https://sandbox.foo.org/worldcat/search/my-local-bib-data"
+        )
+
+    def test_json_header_shared(self, stub_session, mocker):
+        send = mocker.patch.object(stub_session, "send")
+        send.return_value.status_code = 200
+        stub_session.holdings_get_codes()
+        stub_session.holdings_set(12345)
+        assert dict(_JSON_HEADER) == {"Accept": "application/json"}
+        assert send.call_args[0][0].headers["Accept"] == "application/json"
+
+    def test_brief_bibs_search_skips_missing_params(self, stub_session, mocker):
+        send = mocker.patch.object(stub_session, "send")
+        send.return_value.status_code = 200
+        stub_session.brief_bibs_search(q="ti:Zendegi", inLanguage="eng", offset=0)
+        url = send.call_args[0][0].url
+        assert url.startswith(
+            "https://metadata.api.oclc.org/worldcat/search/brief-bibs"
+            "?q=ti%3AZendegi&inLanguage=eng&inCatalogLanguage=eng"
+        )
+        assert "offset=0" in url
+        assert "deweyNumber" not in url
+
     @pytest.mark.http_code(200)
     def test_brief_bibs_get_other_editions(self, stub_session, mock_session_response):
         assert stub_session.brief_bibs_get_other_editions(12345).status_code == 200
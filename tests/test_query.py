@@ -4,6 +4,7 @@ import datetime
 
 import pytest
 
+import requests
 from requests import Request
 
 from bookops_worldcat.errors import WorldcatRequestError
@@ -23,11 +24,17 @@ def test_query_with_stale_token(stub_session, mock_now, mock_session_response):
         datetime.timezone.utc
     ) - datetime.timedelta(0, 1)
     assert stub_session.authorization.is_expired() is True
+    stub_session.authorization.token_str = "tk_expired"
 
     req = Request("GET", "http://foo.org")
     prepped = stub_session.prepare_request(req)
+    assert prepped.headers["Authorization"] == "Bearer tk_expired"
     query = Query(stub_session, prepped)
     assert stub_session.authorization.is_expired() is False
+    assert (
+        prepped.headers["Authorization"]
+        == "Bearer tk_Yebz4BpEp9dAsghA7KpWx6dYD1OZKWBlHjqW"
+    )
     assert query.response.status_code == 200
 
 
@@ -103,6 +110,7 @@ def test_query_timeout_exception(stub_session, mock_timeout):
         Query(stub_session, prepped)
 
     assert "Connection Error: <class 'requests.exceptions.Timeout'>" in str(exc.value)
+    assert isinstance(exc.value.__cause__, requests.exceptions.Timeout)
 
 
 def test_query_connection_exception(stub_session, mock_connection_error):
@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import threading
+import time
+
 import pytest
+import requests
 
 
-from bookops_worldcat._session import WorldcatSession
+from bookops_worldcat._session import (
+    WorldcatSession,
+    _BearerAuth,
+    _ConcurrencyLimit,
+    _ResponseCache,
+    _is_throttled,
+)
+from bookops_worldcat.authorize import WorldcatAccessToken
+from bookops_worldcat.errors import WorldcatRequestError
 from bookops_worldcat.__version__ import __title__, __version__
 
 
@@ -22,6 +34,11 @@ class TestWorldcatSession:
             == "my_app"
         )
 
+    def test_keep_alive_header(self, mock_token):
+        with WorldcatSession(mock_token) as session:
+            assert session.headers["Connection"] == "keep-alive"
+            assert "Expect" not in session.headers
+
     @pytest.mark.parametrize(
         "arg",
         [123, {}, (), ""],
@@ -39,10 +56,79 @@ class TestWorldcatSession:
         with WorldcatSession(mock_token, timeout=1) as session:
             assert session.timeout == 1
 
+    def test_default_timeout_not_stored_on_instance(self, mock_token):
+        with WorldcatSession(mock_token) as session:
+            assert "timeout" not in vars(session)
+            assert session.timeout is WorldcatSession.timeout
+
+    def test_equal_timeout_not_stored_on_instance(self, mock_token):
+        with WorldcatSession(mock_token, timeout=(5, 5)) as session:
+            assert "timeout" not in vars(session)
+
+    def test_no_timeout(self, mock_token):
+        with WorldcatSession(mock_token, timeout=None) as session:
+            assert session.timeout is None
+
     def test_default_adapter(self, mock_token):
         with WorldcatSession(mock_token) as session:
             assert session.adapters["https://"].max_retries.total == 0
 
+    def test_default_adapter_shared(self, mock_token):
+        with WorldcatSession(mock_token) as session1, WorldcatSession(
+            mock_token
+        ) as session2:
+            assert session1.adapters["https://"] is session2.adapters["https://"]
+
+    def test_default_adapter_survives_session_close(self, mock_token):
+        with WorldcatSession(mock_token) as session:
+            adapter = session.adapters["https://"]
+            pool = adapter.poolmanager.connection_from_url("https://foo.bar")
+        assert adapter.poolmanager.connection_from_url("https://foo.bar") is pool
+
+    def test_custom_adapter(self, mock_token):
+        adapter = requests.adapters.HTTPAdapter()
+        with WorldcatSession(mock_token, totalRetries=3, adapter=adapter) as session:
+            assert session.adapters["https://"] is adapter
+            assert session.adapters["https://"].max_retries.total == 0
+
+    @pytest.mark.parametrize("retries", [0, 1])
+    def test_adapter_mounted_for_all_schemes(self, mock_token, retries):
+        with WorldcatSession(mock_token, totalRetries=retries) as session:
+            assert list(session.adapters.keys()) == ["https://", "http://"]
+            assert session.adapters["http://"] is session.adapters["https://"]
+            assert session.get_adapter("http://foo.bar") is session.adapters["https://"]
+
+    def test_custom_pool_maxsize(self, mock_token):
+        with WorldcatSession(mock_token, poolMaxsize=100) as session:
+            adapter = session.adapters["https://"]
+            assert adapter._pool_maxsize == 100
+            assert adapter._pool_block is False
+            assert adapter.max_retries.total == 0
+
+    def test_pool_block(self, mock_token):
+        with WorldcatSession(mock_token, poolMaxsize=4, poolBlock=True) as session:
+            adapter = session.adapters["https://"]
+            assert adapter._pool_maxsize == 4
+            assert adapter._pool_block is True
+
+    @pytest.mark.parametrize("arg", [0, -1, "10", 1.5])
+    def test_pool_maxsize_error(self, mock_token, arg):
+        with pytest.raises(ValueError) as exc:
+            WorldcatSession(mock_token, poolMaxsize=arg)
+        assert "Argument 'poolMaxsize' must be a positive integer." in str(exc.value)
+
+    @pytest.mark.parametrize("arg", [-1, "10", 1.5, None])
+    def test_cache_size_error(self, mock_token, arg):
+        with pytest.raises(ValueError) as exc:
+            WorldcatSession(mock_token, cacheSize=arg)
+        assert "Argument 'cacheSize' must be a non-negative integer." in str(exc.value)
+
+    @pytest.mark.parametrize("arg", [0, -1, "10", None])
+    def test_cache_ttl_error(self, mock_token, arg):
+        with pytest.raises(ValueError) as exc:
+            WorldcatSession(mock_token, cacheSize=10, cacheTtl=arg)
+        assert "Argument 'cacheTtl' must be a positive number." in str(exc.value)
+
     def test_adapter_retries(self, mock_token):
         with WorldcatSession(
             authorization=mock_token,
@@ -51,12 +137,27 @@ class TestWorldcatSession:
             statusForcelist=[500, 502, 503, 504],
             allowedMethods=["GET", "POST", "PUT"],
         ) as session:
-            assert session.adapters["https://"].max_retries.status_forcelist == [
+            assert session.adapters["https://"].max_retries.status_forcelist == (
                 500,
                 502,
                 503,
                 504,
-            ]
+            )
+
+    def test_retry_shared_between_sessions(self, mock_token):
+        kwargs = dict(
+            totalRetries=3,
+            backoffFactor=0.5,
+            statusForcelist=[500, 502, 503, 504],
+            allowedMethods=["GET", "POST", "PUT"],
+        )
+        with WorldcatSession(mock_token, **kwargs) as session1, WorldcatSession(
+            mock_token, **kwargs
+        ) as session2:
+            assert (
+                session1.adapters["https://"].max_retries
+                is session2.adapters["https://"].max_retries
+            )
 
     def test_no_statusForcelist(self, mock_token):
         with WorldcatSession(
@@ -69,7 +170,16 @@ class TestWorldcatSession:
                 "https://"
             ].max_retries.status_forcelist == frozenset({413, 429, 503})
 
-    @pytest.mark.parametrize("arg", [[], "", 123, {}, ["123", "234"]])
+    def test_statusForcelist_tuple(self, mock_token):
+        with WorldcatSession(
+            authorization=mock_token, totalRetries=2, statusForcelist=(500, 502)
+        ) as session:
+            assert session.adapters["https://"].max_retries.status_forcelist == (
+                500,
+                502,
+            )
+
+    @pytest.mark.parametrize("arg", [[], "", 123, {}, ["123", "234"], "500"])
     def test_statusForcelist_error(self, mock_token, arg):
         with pytest.raises(ValueError) as exc:
             WorldcatSession(
@@ -80,3 +190,272 @@ class TestWorldcatSession:
                 allowedMethods=["GET"],
             )
         assert "Argument 'statusForcelist' must be a list of integers" in str(exc.value)
+
+    def test_get_new_access_token_single_flight(self, mock_token, monkeypatch):
+        calls = []
+
+        def mock_request_token(self):
+            calls.append(1)
+            self.token_str = f"tk_{len(calls)}"
+
+        monkeypatch.setattr(WorldcatAccessToken, "_request_token", mock_request_token)
+        with WorldcatSession(mock_token) as session:
+            threads = [
+                threading.Thread(target=session._get_new_access_token) for _ in range(5)
+            ]
+            with session.authorization._refresh_lock:
+                for t in threads:
+                    t.start()
+                time.sleep(0.1)
+            for t in threads:
+                t.join()
+            assert len(calls) == 1
+            assert session.authorization.token_str == "tk_1"
+
+    def test_get_new_access_token_shared_token(self, mock_token, monkeypatch):
+        calls = []
+
+        def mock_request_token(self):
+            calls.append(1)
+            self.token_str = f"tk_{len(calls)}"
+
+        monkeypatch.setattr(WorldcatAccessToken, "_request_token", mock_request_token)
+        with WorldcatSession(mock_token) as session1, WorldcatSession(
+            mock_token
+        ) as session2:
+            threads = [
+                threading.Thread(target=session._get_new_access_token)
+                for session in (session1, session2, session1, session2)
+            ]
+            with mock_token._refresh_lock:
+                for t in threads:
+                    t.start()
+                time.sleep(0.1)
+            for t in threads:
+                t.join()
+        assert len(calls) == 1
+        assert mock_token.token_str == "tk_1"
+
+    @pytest.mark.http_code(200)
+    def test_execute(self, stub_session, mock_session_response):
+        prepped = stub_session.prepare_request(
+            requests.Request("GET", "https://foo.org")
+        )
+        assert stub_session._execute(prepped, 2).status_code == 200
+
+    @pytest.mark.http_code(404)
+    def test_execute_http_error(self, stub_session, mock_session_response):
+        prepped = stub_session.prepare_request(
+            requests.Request("GET", "https://foo.org")
+        )
+        with pytest.raises(WorldcatRequestError) as exc:
+            stub_session._execute(prepped, 2)
+        assert "404 Client Error: 'foo' for url: https://foo.bar?query." in str(
+            exc.value
+        )
+
+    def test_bulk(self, mock_token):
+        with WorldcatSession(mock_token) as session:
+            assert session.bulk(lambda n: n * 2, range(20), maxWorkers=4) == [
+                n * 2 for n in range(20)
+            ]
+
+    @pytest.mark.http_code(200)
+    def test_bulk_session_requests(self, stub_session, mock_session_response):
+        responses = stub_session.bulk(stub_session.bib_get, [12345, "ocm00012346"])
+        assert [r.status_code for r in responses] == [200, 200]
+
+    def test_bulk_iter(self, mock_token):
+        with WorldcatSession(mock_token) as session:
+            results = session.bulk_iter(lambda n: n * 2, range(50), maxWorkers=4)
+            assert list(results) == [n * 2 for n in range(50)]
+
+    def test_bulk_iter_consumes_iterable_lazily(self, mock_token):
+        taken = []
+
+        def items():
+            for n in range(100):
+                taken.append(n)
+                yield n
+
+        with WorldcatSession(mock_token) as session:
+            results = session.bulk_iter(lambda n: n, items(), maxWorkers=4)
+            assert next(results) == 0
+            assert len(taken) == 8
+            results.close()
+
+    def test_bulk_iter_error(self, mock_token):
+        calls = []
+
+        def func(n):
+            calls.append(n)
+            if n == 3:
+                raise ValueError("spam")
+            return n
+
+        with WorldcatSession(mock_token) as session:
+            results = session.bulk_iter(func, range(1000), maxWorkers=2)
+            with pytest.raises(ValueError):
+                list(results)
+        assert len(calls) < 1000
+
+    @pytest.mark.http_code(200)
+    def test_bulk_iter_session_requests(self, stub_session, mock_session_response):
+        responses = stub_session.bulk_iter(stub_session.bib_get, [12345, 12346])
+        assert [r.status_code for r in responses] == [200, 200]
+
+    def test_bulk_reduces_concurrency_when_throttled(self, mock_token):
+        lock = threading.Lock()
+        in_flight = []
+        active = 0
+
+        def throttled(n):
+            nonlocal active
+            with lock:
+                active += 1
+                in_flight.append(active)
+            time.sleep(0.01)
+            response = requests.Response()
+            response.status_code = 429
+            with lock:
+                active -= 1
+            return response
+
+        with WorldcatSession(mock_token) as session:
+            responses = session.bulk(throttled, range(40), maxWorkers=8)
+        assert len(responses) == 40
+        assert max(in_flight[-10:]) == 1
+
+
+class TestConcurrencyLimit:
+    """Tests _ConcurrencyLimit object and _is_throttled function"""
+
+    def test_limit_halved_when_throttled(self):
+        limit = _ConcurrencyLimit(8)
+        limit.acquire()
+        limit.release(True)
+        assert limit.limit == 4
+        for _ in range(5):
+            limit.acquire()
+            limit.release(True)
+        assert limit.limit == 1
+
+    def test_limit_grows_back(self):
+        limit = _ConcurrencyLimit(4)
+        limit.limit = 1.0
+        limit.acquire()
+        limit.release(False)
+        assert limit.limit == 2
+        for _ in range(20):
+            limit.acquire()
+            limit.release(False)
+        assert limit.limit == 4
+
+    @pytest.mark.parametrize("code,expectation", [(200, False), (429, True)])
+    def test_is_throttled_response(self, code, expectation):
+        response = requests.Response()
+        response.status_code = code
+        assert _is_throttled(response) is expectation
+
+    def test_is_throttled_retried_response(self):
+        from urllib3.util.retry import RequestHistory, Retry
+
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = type("Raw", (), {})()
+        response.raw.retries = Retry(
+            history=(RequestHistory("GET", "https://foo.org", None, 503, None),)
+        )
+        assert _is_throttled(response) is True
+
+    def test_is_throttled_exception(self):
+        response = requests.Response()
+        response.status_code = 429
+        try:
+            try:
+                raise requests.exceptions.HTTPError(response=response)
+            except requests.exceptions.HTTPError as exc:
+                raise ValueError() from exc
+        except ValueError as exc:
+            assert _is_throttled(exc) is True
+
+    def test_is_throttled_other_values(self):
+        assert _is_throttled(ValueError()) is False
+        assert _is_throttled("foo") is False
+
+
+class TestResponseCache:
+    """Tests _ResponseCache object"""
+
+    def test_get_and_set(self):
+        cache = _ResponseCache(2, 60)
+        response = requests.Response()
+        assert cache.get(("foo", "application/json")) is None
+        cache.set(("foo", "application/json"), response)
+        assert cache.get(("foo", "application/json")) is response
+        assert len(cache) == 1
+
+    def test_disabled(self):
+        cache = _ResponseCache(0, 60)
+        cache.set(("foo", "application/json"), requests.Response())
+        assert cache.get(("foo", "application/json")) is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_evicted(self):
+        cache = _ResponseCache(2, 60)
+        cache.set(("foo", "application/json"), requests.Response())
+        cache.set(("bar", "application/json"), requests.Response())
+        cache.get(("foo", "application/json"))
+        cache.set(("baz", "application/json"), requests.Response())
+        assert cache.get(("bar", "application/json")) is None
+        assert cache.get(("foo", "application/json")) is not None
+        assert cache.get(("baz", "application/json")) is not None
+
+    def test_expired(self, monkeypatch):
+        cache = _ResponseCache(2, 60)
+        cache.set(("foo", "application/json"), requests.Response())
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+        assert cache.get(("foo", "application/json")) is None
+        assert len(cache) == 0
+
+    def test_discard(self):
+        cache = _ResponseCache(3, 60)
+        cache.set(("foo", "application/json"), requests.Response())
+        cache.set(("foo", "application/marc"), requests.Response())
+        cache.set(("bar", "application/json"), requests.Response())
+        cache.discard("foo")
+        assert cache.get(("foo", "application/json")) is None
+        assert cache.get(("foo", "application/marc")) is None
+        assert cache.get(("bar", "application/json")) is not None
+
+    def test_discard_empty(self):
+        cache = _ResponseCache(3, 60)
+        cache.discard("foo")
+        assert len(cache) == 0
+
+    def test_clear(self):
+        cache = _ResponseCache(2, 60)
+        cache.set(("foo", "application/json"), requests.Response())
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestBearerAuth:
+    """Tests _BearerAuth object"""
+
+    def test_header_reused_for_unchanged_token(self, mock_token):
+        auth = _BearerAuth(mock_token)
+        first = auth(requests.Request("GET", "https://foo.org").prepare())
+        second = auth(requests.Request("GET", "https://foo.org").prepare())
+        assert first.headers["Authorization"] == (
+            "Bearer tk_Yebz4BpEp9dAsghA7KpWx6dYD1OZKWBlHjqW"
+        )
+        assert first.headers["Authorization"] is second.headers["Authorization"]
+
+    def test_header_updated_for_new_token(self, mock_token):
+        auth = _BearerAuth(mock_token)
+        auth(requests.Request("GET", "https://foo.org").prepare())
+        mock_token.token_str = "tk_new"
+        req = auth(requests.Request("GET", "https://foo.org").prepare())
+        assert req.headers["Authorization"] == "Bearer tk_new"
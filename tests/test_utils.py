@@ -32,6 +32,17 @@ class TestUtils:
     def test_prep_oclc_number_str(self, argm, expectation):
         assert prep_oclc_number_str(argm) == expectation
 
+    def test_prep_oclc_number_str_cached(self):
+        prep_oclc_number_str.cache_clear()
+        assert prep_oclc_number_str("ocm00012345") == "12345"
+        assert prep_oclc_number_str("ocm00012345") == "12345"
+        assert prep_oclc_number_str.cache_info().hits == 1
+
+    def test_prep_oclc_number_str_exception_repeated(self):
+        for _ in range(2):
+            with pytest.raises(InvalidOclcNumber):
+                prep_oclc_number_str("ODN00012345")
+
     def test_prep_oclc_number_str_exception(self):
         err_msg = "Argument 'oclcNumber' does not look like real OCLC #."
         with pytest.raises(InvalidOclcNumber) as exc:
@@ -561,7 +561,6 @@ class TestLiveMetadataSessionErrors:
         )
         token.token_str = "invalid-token"
         with MetadataSession(authorization=token) as session:
-            session.headers.update({"Authorization": "Bearer invalid-token"})
             with pytest.raises(WorldcatRequestError) as exc:
                 session.brief_bibs_get(41266045)
 